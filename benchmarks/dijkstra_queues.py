@@ -0,0 +1,58 @@
+"""
+Compare Dijkstra priority queues on random integer-weighted graphs.
+
+Run from the project root:
+    python -m benchmarks.dijkstra_queues [n]
+"""
+import random
+import sys
+import time
+from functools import partial
+
+from lib.dijkstra import Graph, dijkstra
+from lib.priority_queues import LazyHeap, IndexedDaryHeap, BucketQueue
+
+MAX_WEIGHT = 10
+
+
+def random_graph(n, avg_degree, seed=0):
+    rng = random.Random(seed)
+    g = Graph(n)
+    for u in range(n):
+        for _ in range(avg_degree):
+            g.add_edge(u, rng.randrange(n), rng.randint(1, MAX_WEIGHT))
+    return g
+
+
+def best_time(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    queues = {
+        "heapq (lazy)": LazyHeap,
+        "4-ary indexed": IndexedDaryHeap,
+        "bucket (Dial)": partial(BucketQueue, max_weight=MAX_WEIGHT),
+    }
+
+    print(f"n = {n:,}, integer weights 1..{MAX_WEIGHT}\n")
+    print(f"{'avg degree':>10} | " + " | ".join(f"{name:>14}" for name in queues))
+    print("-" * (13 + 17 * len(queues)))
+    for degree in (2, 5, 10, 20):
+        g = random_graph(n, degree)
+        reference = dijkstra(g, 0)[0]
+        times = []
+        for queue in queues.values():
+            assert dijkstra(g, 0, queue=queue)[0] == reference
+            times.append(best_time(lambda: dijkstra(g, 0, queue=queue)))
+        print(f"{degree:>10} | " + " | ".join(f"{t:>12.3f} s" for t in times))
+
+
+if __name__ == "__main__":
+    main()
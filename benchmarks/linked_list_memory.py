@@ -0,0 +1,41 @@
+"""
+Memory benchmark for the LinkedList storage backends.
+
+Run from the project root:
+    python -m benchmarks.linked_list_memory [n]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from lib.linked_list import LinkedList, ArrayLinkedList
+
+
+def measure(label, build, n):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    lst = build(range(n))
+    elapsed = time.perf_counter() - t0
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(lst) == n
+    del lst
+    print(f"{label:<28} | {current / 2**20:10.1f} MiB | {peak / 2**20:10.1f} MiB | "
+          f"{current / n:8.1f} B/item | {elapsed:7.2f} s")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    print(f"Building lists of {n:,} integers\n")
+    print(f"{'Backend':<28} | {'Retained':>14} | {'Peak':>14} | {'Per item':>13} | {'Time':>9}")
+    print("-" * 92)
+    measure("LinkedList (slots nodes)", LinkedList.from_iterable, n)
+    measure("ArrayLinkedList (list)", ArrayLinkedList.from_iterable, n)
+    measure("ArrayLinkedList (typed 'q')",
+            lambda it: ArrayLinkedList.from_iterable(it, typecode="q"), n)
+
+
+if __name__ == "__main__":
+    main()
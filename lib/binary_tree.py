@@ -1,19 +1,9 @@
-import uuid
 import networkx as nx
+import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 
-
-class Node:
-    """
-    Node class for a binary tree.
-    Each node has: value, left child, right child, color, and unique id.
-    """
-    def __init__(self, key, color="skyblue"):
-        self.left = None
-        self.right = None
-        self.val = key
-        self.color = color
-        self.id = str(uuid.uuid4())  # unique identifier for each node
+from lib.tree_core import Node, ImplicitTree, build_tree_from_level_array
 
 
 def add_edges(graph, node, pos, x=0, y=0, layer=1):
@@ -50,10 +40,17 @@ def draw_tree(tree_root, title="Binary Heap"):
     """
     Draws the tree using matplotlib and networkx.
     """
-    plt.close('all')
     tree = nx.DiGraph()
     pos = {tree_root.id: (0, 0)}  # root at (0,0)
     tree = add_edges(tree, tree_root, pos)
+    draw_graph(tree, pos, title=title)
+
+
+def draw_graph(tree, pos, title="Binary Heap"):
+    """
+    Draws a tree graph whose nodes carry 'color' and 'label' attributes.
+    """
+    plt.close('all')
 
     # extract colors and labels
     colors = [node[1]['color'] for node in tree.nodes(data=True)]
@@ -73,44 +70,74 @@ def draw_tree(tree_root, title="Binary Heap"):
     plt.show()
 
 
-def build_tree_from_level_array(level_list, color_fn=None):
+def visualize_heap(heap_array, color_fn=None, title="Binary Heap"):
     """
-    Build a binary tree from a level-order array (heap representation).
-    None means "no node" at that position.
-    color_fn: optional function to assign colors per node (value, index).
+    Visualize a binary heap given as an array.
+    The layout comes straight from the array indices (ImplicitTree),
+    so no Node objects are built.
     """
-    if not level_list:
-        return None
-
-    # create Node objects
-    nodes = []
-    for i, v in enumerate(level_list):
-        if v is None:
-            nodes.append(None)
-        else:
-            color = color_fn(v, i) if color_fn else "skyblue"
-            nodes.append(Node(v, color=color))
-
-    # connect children using array indices
-    n = len(nodes)
-    for i in range(n):
-        if nodes[i] is None:
-            continue
-        li = 2 * i + 1
-        ri = 2 * i + 2
-        if li < n and nodes[li] is not None:
-            nodes[i].left = nodes[li]
-        if ri < n and nodes[ri] is not None:
-            nodes[i].right = nodes[ri]
-
-    return nodes[0]  # return root
+    tree = ImplicitTree.from_level_array(heap_array, color_fn=color_fn)
+    if len(tree) == 0:
+        raise ValueError("Heap is empty. Nothing to visualize.")
+    draw_graph(*tree.to_networkx(), title=title)
 
 
-def visualize_heap(heap_array, color_fn=None, title="Binary Heap"):
+# =========================
+# Closed-form renderer for large heaps
+# =========================
+
+def draw_heap_fast(heap, color_fn=None, title="Binary Heap", ax=None,
+                   max_labels_per_level=32, default_color="skyblue"):
     """
-    Visualize a binary heap given as an array.
+    Draw a heap array (or an ImplicitTree) with positions computed directly
+    from indices. Edges are one LineCollection and nodes one scatter, so
+    this scales to ~100k elements. Levels with more than
+    max_labels_per_level nodes are drawn without labels, and marker size
+    shrinks with the tree's depth. Returns the Axes.
     """
-    root = build_tree_from_level_array(heap_array, color_fn=color_fn)
-    if root is None:
+    tree = heap if isinstance(heap, ImplicitTree) else ImplicitTree.from_level_array(heap, color_fn)
+    if len(tree) == 0:
         raise ValueError("Heap is empty. Nothing to visualize.")
-    draw_tree(root, title=title)
+
+    values = tree.values
+    x, y = tree.positions()
+    idx = tree.indices()
+
+    if ax is None:
+        fig, ax = plt.subplots(num=title, figsize=(8, 5), clear=True)
+        try:
+            fig.canvas.manager.set_window_title(title)
+        except Exception:
+            pass
+
+    parents, children = tree.edges()
+    segments = np.stack([np.column_stack([x[parents], y[parents]]),
+                         np.column_stack([x[children], y[children]])], axis=1)
+    ax.add_collection(LineCollection(segments, colors="black", linewidths=0.5, zorder=1))
+
+    if tree.colors:
+        colors = [tree.colors[i] for i in idx.tolist()]
+    else:
+        colors = default_color
+    depth = tree.depth()
+    node_size = max(2.0, 2500 / 4 ** max(0, depth - 2))
+    ax.scatter(x[idx], y[idx], s=node_size, c=colors, zorder=2, linewidths=0)
+
+    # Level of detail: only label levels that still have room for text
+    label_levels = max_labels_per_level.bit_length()
+    for i in idx[idx < (1 << label_levels) - 1].tolist():
+        ax.text(x[i], y[i], str(values[i]), ha="center", va="center",
+                fontsize=10 if depth < 5 else 7, zorder=3)
+
+    ax.set_title(title)
+    ax.set_xlim(-1.05, 1.05)
+    ax.set_ylim(-depth - 0.5, 0.5)
+    ax.set_axis_off()
+    return ax
+
+
+def visualize_heap_fast(heap, color_fn=None, title="Binary Heap", **kwargs):
+    """Like visualize_heap, but with the closed-form collection renderer."""
+    plt.close('all')
+    draw_heap_fast(heap, color_fn=color_fn, title=title, **kwargs)
+    plt.show()
@@ -1,67 +1,19 @@
-import uuid
 import os
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import networkx as nx
-import matplotlib.pyplot as plt
+import numpy as np
 import imageio.v2 as imageio
+from PIL import GifImagePlugin, Image, ImageColor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PathCollection
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.textpath import TextPath
+from matplotlib.transforms import Affine2D
 
-
-# =========================
-# Node & Tree Construction
-# =========================
-
-class Node:
-    """
-    Binary tree node.
-    Keeps: value, left, right, a display color (overridden during traversal),
-    and a unique id (useful for NetworkX nodes).
-    """
-    def __init__(self, key, color="skyblue"):
-        self.left = None
-        self.right = None
-        self.val = key
-        self.color = color
-        self.id = str(uuid.uuid4())
-
-
-def build_tree_from_level_array(level_list, color_fn=None):
-    """
-    Build a binary tree from a level-order (heap-like) array.
-    None in the array means "no node" at that index.
-
-    Args:
-        level_list: list of values (e.g., [1, 3, 5, 7, 9, 11, 13])
-        color_fn: optional function (value, index) -> initial color (str)
-
-    Returns:
-        root: Node
-    """
-    if not level_list:
-        return None
-
-    # Create nodes or None placeholders
-    nodes = []
-    for i, v in enumerate(level_list):
-        if v is None:
-            nodes.append(None)
-        else:
-            color = color_fn(v, i) if color_fn else "skyblue"
-            nodes.append(Node(v, color=color))
-
-    # Connect children using array indices
-    n = len(nodes)
-    for i in range(n):
-        if nodes[i] is None:
-            continue
-        li = 2 * i + 1
-        ri = 2 * i + 2
-        if li < n and nodes[li] is not None:
-            nodes[i].left = nodes[li]
-        if ri < n and nodes[ri] is not None:
-            nodes[i].right = nodes[ri]
-
-    return nodes[0]
+from lib.tree_core import Node, ImplicitTree, build_tree_from_level_array, heap_levels, heap_reachable
 
 
 # ======================================
@@ -78,10 +30,16 @@ def build_graph_and_positions_iter(root):
             left  -> (x - 1 / 2^layer, y - 1)
             right -> (x + 1 / 2^layer, y - 1)
 
+    An ImplicitTree is laid out directly from its indices (node id = index).
+
     Returns:
         G: nx.DiGraph with node attributes {'label', 'color'}
         pos: dict node_id -> (x, y)
     """
+    if isinstance(root, ImplicitTree):
+        if len(root) == 0:
+            raise ValueError("Empty tree")
+        return root.to_networkx()
     if root is None:
         raise ValueError("Empty tree")
 
@@ -124,10 +82,12 @@ def build_graph_and_positions_iter(root):
 def dfs_preorder_iter(root):
     """
     Preorder DFS (Root -> Left -> Right) using an explicit STACK.
-    Returns list of Node in visit order.
+    Returns list of Node in visit order (node indices for an ImplicitTree).
     """
     if not root:
         return []
+    if isinstance(root, ImplicitTree):
+        return dfs_preorder_indices(root).tolist()
     order = []
     stack = [root]
     while stack:
@@ -144,10 +104,13 @@ def dfs_preorder_iter(root):
 def bfs_level_order_iter(root):
     """
     Level-order BFS using a QUEUE.
-    Returns list of Node in visit order.
+    Returns list of Node in visit order (node indices for an ImplicitTree,
+    where level order is simply ascending index order).
     """
     if not root:
         return []
+    if isinstance(root, ImplicitTree):
+        return bfs_order_indices(root).tolist()
     order = []
     q = deque([root])
     while q:
@@ -160,6 +123,206 @@ def bfs_level_order_iter(root):
     return order
 
 
+# =========================
+# Lazy Traversals (generators)
+# =========================
+
+def iter_preorder(root):
+    """Yield nodes Root -> Left -> Right; memory is O(height) for the stack."""
+    stack = [root] if root else []
+    while stack:
+        node = stack.pop()
+        yield node
+        if node.right:
+            stack.append(node.right)
+        if node.left:
+            stack.append(node.left)
+
+
+def iter_inorder(root):
+    """Yield nodes Left -> Root -> Right."""
+    stack = []
+    node = root
+    while stack or node:
+        while node:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        yield node
+        node = node.right
+
+
+def iter_postorder(root):
+    """Yield nodes Left -> Right -> Root."""
+    stack = []
+    node, last = root, None
+    while stack or node:
+        while node:
+            stack.append(node)
+            node = node.left
+        top = stack[-1]
+        if top.right and top.right is not last:
+            node = top.right
+        else:
+            stack.pop()
+            yield top
+            last = top
+
+
+def iter_levels(root):
+    """Yield one list of nodes per level (level-by-level BFS batches)."""
+    level = [root] if root else []
+    while level:
+        yield level
+        level = [child for node in level for child in (node.left, node.right) if child]
+
+
+def iter_level_order(root):
+    """Yield nodes in level order using a QUEUE."""
+    q = deque([root] if root else [])
+    while q:
+        node = q.popleft()
+        yield node
+        if node.left:
+            q.append(node.left)
+        if node.right:
+            q.append(node.right)
+
+
+def _morris_walk(current):
+    """Finish a Morris walk without output, removing every remaining thread."""
+    while current:
+        if current.left is None:
+            current = current.right
+            continue
+        pred = current.left
+        while pred.right and pred.right is not current:
+            pred = pred.right
+        if pred.right is None:
+            pred.right = current
+            current = current.left
+        else:
+            pred.right = None
+            current = current.right
+
+
+def morris_inorder(root):
+    """
+    In-order traversal in O(1) extra memory (Morris threading).
+    The tree is temporarily threaded through right pointers of in-order
+    predecessors; it is fully restored when the generator finishes or is
+    closed early.
+    """
+    current, resume = root, None
+    try:
+        while current:
+            if current.left is None:
+                resume = current.right
+                yield current
+                current = current.right
+                continue
+            pred = current.left
+            while pred.right and pred.right is not current:
+                pred = pred.right
+            if pred.right is None:
+                pred.right = current  # thread back to current
+                current = current.left
+            else:
+                pred.right = None     # left subtree done: remove thread
+                resume = current.right
+                yield current
+                current = current.right
+        resume = None
+    finally:
+        _morris_walk(resume)
+
+
+def morris_preorder(root):
+    """Pre-order traversal in O(1) extra memory; see morris_inorder."""
+    current, resume = root, None
+    try:
+        while current:
+            if current.left is None:
+                resume = current.right
+                yield current
+                current = current.right
+                continue
+            pred = current.left
+            while pred.right and pred.right is not current:
+                pred = pred.right
+            if pred.right is None:
+                resume = current  # not threaded yet
+                yield current
+                pred.right = current
+                current = current.left
+            else:
+                pred.right = None
+                current = current.right
+        resume = None
+    finally:
+        _morris_walk(resume)
+
+
+# =========================
+# Index-only Traversals (implicit trees, vectorized)
+# =========================
+
+def _implicit_levels(tree):
+    """
+    Node indices, their level L and their position p within the level.
+    tree: ImplicitTree, a boolean presence mask, or a level-order list with None.
+    """
+    if isinstance(tree, ImplicitTree):
+        present = tree.present
+    elif isinstance(tree, np.ndarray) and tree.dtype == bool:
+        present = heap_reachable(tree)
+    else:
+        present = ImplicitTree.from_level_array(tree).present
+    idx = np.flatnonzero(present)
+    level = heap_levels(len(present))[idx]
+    return idx, level, idx - ((1 << level) - 1)
+
+
+def bfs_order_indices(tree):
+    """Level-order visit order as an index array: ascending index order."""
+    return _implicit_levels(tree)[0]
+
+
+def dfs_preorder_indices(tree):
+    """
+    Pre-order (Root -> Left -> Right) visit order as an index array.
+    With H the deepest level, node (L, p) covers the leaf slots starting at
+    p * 2^(H - L); sorting by that start, ancestors first, is pre-order.
+    """
+    idx, level, p = _implicit_levels(tree)
+    if len(idx) == 0:
+        return idx
+    shift = int(level[-1]) - level
+    return idx[np.lexsort((level, p << shift))]
+
+
+def dfs_inorder_indices(tree):
+    """In-order visit order: sort by x position, (2p + 1) * 2^(H - L)."""
+    idx, level, p = _implicit_levels(tree)
+    if len(idx) == 0:
+        return idx
+    shift = int(level[-1]) - level
+    return idx[np.argsort((2 * p + 1) << shift, kind="stable")]
+
+
+def dfs_postorder_indices(tree):
+    """
+    Post-order (Left -> Right -> Root) visit order as an index array.
+    Node (L, p) ends at leaf slot (p + 1) * 2^(H - L); sorting by that end,
+    descendants first, is post-order.
+    """
+    idx, level, p = _implicit_levels(tree)
+    if len(idx) == 0:
+        return idx
+    shift = int(level[-1]) - level
+    return idx[np.lexsort((-level, (p + 1) << shift))]
+
+
 # =========================
 # Color Utilities (HEX)
 # =========================
@@ -208,78 +371,254 @@ def gradient_hex(start_hex, end_hex, n):
 # Drawing & Animation
 # =========================
 
-def _draw_frame(G, pos, id_to_color, title, filename):
+UNVISITED_COLOR = "#D3D3D3"
+
+
+class TraversalRenderer:
     """
-    Render a single frame:
-      - visited nodes colored with id_to_color
-      - unvisited nodes shown in light gray
+    Off-screen renderer for traversal frames.
+    The tree (edges, nodes, labels) is drawn once on an Agg canvas; each
+    frame only changes node face colors and the title, redraws the canvas,
+    and grabs its RGBA buffer. No window, no pyplot state, no files.
     """
-    plt.close('all')
-    fig, ax = plt.subplots(figsize=(8, 5), constrained_layout=True)
-    try:
-        fig.canvas.manager.set_window_title(title)
-    except Exception:
-        pass
-
-    # Node colors (visited get their assigned color; others are gray)
-    colors = []
-    labels = {}
-    for nid, data in G.nodes(data=True):
-        labels[nid] = data.get("label", "")
-        colors.append(id_to_color.get(nid, "#D3D3D3"))
-
-    nx.draw(
-        G,
-        pos=pos,
-        labels=labels,
-        arrows=False,
-        node_size=2500,
-        node_color=colors
-    )
-    ax.set_title(title)
-    ax.set_axis_off()
-    
-    fig.savefig(filename, dpi=140, bbox_inches="tight")
-    plt.close(fig)
+    def __init__(self, G, pos, figsize=(8, 5), dpi=140, node_size=2500):
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        ax = self.fig.add_axes((0.02, 0.02, 0.96, 0.88))
+        ax.set_axis_off()
+
+        self.node_ids = list(G.nodes())
+        self.index = {nid: i for i, nid in enumerate(self.node_ids)}
+        labels = {nid: data.get("label", "") for nid, data in G.nodes(data=True)}
+
+        nx.draw_networkx_edges(G, pos, ax=ax, arrows=False)
+        self.nodes = nx.draw_networkx_nodes(G, pos, ax=ax, node_size=node_size,
+                                            node_color=[UNVISITED_COLOR] * len(self.node_ids))
+        ax.add_collection(self._label_collection(ax, pos, labels))
+        self.title = self.fig.suptitle("")
+        self.colors = [UNVISITED_COLOR] * len(self.node_ids)
+
+    def _label_collection(self, ax, pos, labels, size=12):
+        """
+        All node labels as one collection of glyph outlines centered on the
+        nodes: a single artist instead of one Text per node, which keeps the
+        per-frame redraw cheap for large trees.
+        """
+        font = FontProperties(size=size)
+        paths, offsets = [], []
+        for nid in self.node_ids:
+            path = TextPath((0, 0), str(labels[nid]), prop=font)
+            (x0, y0), (x1, y1) = path.get_extents().get_points()
+            paths.append(path.transformed(Affine2D().translate(-(x0 + x1) / 2, -(y0 + y1) / 2)))
+            offsets.append(pos[nid])
+        labels = PathCollection(paths, offsets=offsets, offset_transform=ax.transData,
+                                facecolors="black", edgecolors="none", zorder=3)
+        labels.set_transform(Affine2D().scale(self.fig.dpi / 72))  # points -> pixels
+        return labels
+
+    def set_color(self, node_id, color):
+        self.colors[self.index[node_id]] = color
+
+    def render(self, title):
+        """Return the current frame as an (H, W, 3) uint8 array."""
+        self.nodes.set_facecolor(self.colors)
+        self.title.set_text(title)
+        self.canvas.draw()
+        return np.asarray(self.canvas.buffer_rgba())[:, :, :3].copy()
+
+
+def _node_id(node):
+    # Node objects carry their id; ImplicitTree nodes are plain indices
+    return node.id if isinstance(node, Node) else int(node)
+
+
+def _iter_frames(renderer, steps, title_prefix, start, stop):
+    """
+    Yield frames start..stop-1, where frame k shows the first k visits of steps
+    (a list of (node_id, color)). The renderer's colors are reset first, so
+    any renderer can produce any range.
+    """
+    renderer.colors = [UNVISITED_COLOR] * len(renderer.node_ids)
+    for node_id, color in steps[:start]:
+        renderer.set_color(node_id, color)
+    for k in range(start, stop):
+        if k > 0:
+            renderer.set_color(*steps[k - 1])
+        yield renderer.render(f"{title_prefix} (step {k})")
+
+
+# =========================
+# Parallel frame rendering
+# =========================
+
+_worker_state = {}
+
+
+def _init_frame_worker(G, pos, steps, title_prefix):
+    """Pool initializer: every worker process builds its own figure once."""
+    _worker_state["renderer"] = TraversalRenderer(G, pos)
+    _worker_state["steps"] = steps
+    _worker_state["title_prefix"] = title_prefix
 
 
-def make_traversal_gif(root, traversal_nodes, dark_hex, light_hex, out_path, title_prefix, frame_duration=0.7):
+def _render_chunk(start, stop):
+    return list(_iter_frames(_worker_state["renderer"], _worker_state["steps"],
+                             _worker_state["title_prefix"], start, stop))
+
+
+def _iter_frames_parallel(G, pos, steps, title_prefix, processes, chunk_size, max_pending):
+    """
+    Yield all frames in order while a process pool renders ahead.
+    At most max_pending chunks (of chunk_size frames) are queued or held
+    at once, which bounds memory no matter how long the animation is.
+    """
+    total = len(steps) + 1
+    chunks = iter(range(0, total, chunk_size))
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_frame_worker,
+                             initargs=(G, pos, steps, title_prefix)) as pool:
+        for start in chunks:
+            pending.append(pool.submit(_render_chunk, start, min(start + chunk_size, total)))
+            if len(pending) >= max_pending:
+                break
+        while pending:
+            frames = pending.popleft().result()
+            start = next(chunks, None)
+            if start is not None:
+                pending.append(pool.submit(_render_chunk, start, min(start + chunk_size, total)))
+            yield from frames
+
+
+# =========================
+# Compact encoding
+# =========================
+
+ANIMATION_FORMATS = {"gif": "GIF", "apng": "PNG", "webp": "WEBP"}
+
+
+def traversal_palette(colors, fixed=("#FFFFFF", "#000000", UNVISITED_COLOR)):
+    """
+    One palette shared by every frame: the fixed background/edge/label/
+    unvisited colors followed by the visit colors. Long gradients are
+    subsampled evenly so the palette fits in 256 entries.
+
+    Returns:
+        a 1x1 "P" image carrying the palette (for Image.quantize)
+    """
+    room = 256 - len(fixed)
+    if len(colors) > room:
+        colors = [colors[round(i * (len(colors) - 1) / (room - 1))] for i in range(room)]
+    flat = [c for h in (*fixed, *colors) for c in ImageColor.getrgb(h)[:3]]
+    palette = Image.new("P", (1, 1))
+    palette.putpalette(flat)
+    return palette
+
+
+def _quantize(frame, palette):
+    """RGB frame -> "P" image mapped to the nearest palette entries (no dithering)."""
+    return Image.fromarray(frame).quantize(palette=palette, dither=Image.Dither.NONE)
+
+
+def _changed_bbox(prev, cur):
+    """(left, top, right, bottom) of the pixels that differ, or None."""
+    diff = prev != cur
+    rows = np.flatnonzero(diff.any(axis=1))
+    if not len(rows):
+        return None
+    cols = np.flatnonzero(diff.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def write_gif_deltas(frames, out_path, palette, duration_ms, loop=0):
+    """
+    Stream frames into a GIF with one global palette and, after the first
+    frame, only the rectangle that changed since the previous one
+    (disposal 1: the rest of the canvas is kept). Each frame is encoded
+    as soon as it arrives; only the previous frame is held.
+    """
+    prev = None
+    with open(out_path, "wb") as fp:
+        for frame in frames:
+            im = _quantize(frame, palette)
+            cur = np.asarray(im)
+            if prev is None:
+                header, _ = GifImagePlugin.getheader(im, info={"loop": loop, "duration": duration_ms})
+                fp.writelines(header)
+                box = (0, 0) + im.size
+            else:
+                # unchanged frame: still emit a 1x1 patch to keep the timing
+                box = _changed_bbox(prev, cur) or (0, 0, 1, 1)
+            fp.writelines(GifImagePlugin.getdata(im.crop(box), offset=box[:2],
+                                                 duration=duration_ms, disposal=1))
+            prev = cur
+        fp.write(b";")
+
+
+def save_animation(frames, out_path, palette, duration_ms, fmt="gif"):
+    """
+    Encode frames as "gif" (see write_gif_deltas), "apng" or "webp".
+    APNG and WebP go through Pillow's writers, which also store only the
+    changed region of each frame; frames are palettized first, which keeps
+    APNG small and WebP losslessly compressible. WebP is encoded as frames
+    arrive; APNG needs all (palettized) frames in memory.
+    """
+    if fmt not in ANIMATION_FORMATS:
+        raise ValueError(f"Unknown animation format: {fmt!r} (use one of {sorted(ANIMATION_FORMATS)}).")
+    if fmt == "gif":
+        write_gif_deltas(frames, out_path, palette, duration_ms)
+        return
+
+    images = (_quantize(frame, palette) for frame in frames)
+    if fmt == "apng":
+        # the PNG writer walks the frames twice, so they are kept (1 byte per pixel)
+        images = list(images)
+        first, images = images[0], images[1:]
+        options = {"disposal": 0, "blend": 0}
+    else:
+        first = next(images)
+        options = {"lossless": True}
+    first.save(out_path, format=ANIMATION_FORMATS[fmt], save_all=True, append_images=images,
+               duration=duration_ms, loop=0, **options)
+
+
+def make_traversal_gif(root, traversal_nodes, dark_hex, light_hex, out_path, title_prefix, frame_duration=0.7,
+                       processes=1, chunk_size=8, max_pending=None, fmt=None):
     """
     Build a GIF visualizing traversal step-by-step.
     Each visited node receives a unique HEX color from a dark->light gradient.
 
     Args:
-        root: tree root (Node)
-        traversal_nodes: list[Node] in visit order
+        root: tree root (Node) or an ImplicitTree
+        traversal_nodes: list[Node] in visit order, or node indices for an ImplicitTree
         dark_hex, light_hex: gradient endpoints
         out_path: output GIF file path
         title_prefix: figure title prefix
         frame_duration: seconds per frame in GIF
+        processes: worker processes rendering frames (None = all cores, 1 = serial)
+        chunk_size: frames rendered per worker task
+        max_pending: chunks in flight at once (default 2 per worker)
+        fmt: None for the imageio GIF writer, or "gif", "apng", "webp" for the
+            compact encoder (shared palette, delta frames; see save_animation)
     """
     G, pos = build_graph_and_positions_iter(root)
 
     # build color palette by visit index
     palette = gradient_hex(dark_hex, light_hex, len(traversal_nodes))
-    id_to_color = {}  # node id -> assigned hex
-
-    # temp frames directory
-    tmp_dir = os.path.join(os.path.dirname(out_path) or ".", "frames")
-    os.makedirs(tmp_dir, exist_ok=True)
-    frame_paths = []
-
-    # initial frame (no nodes visited)
-    f0 = os.path.join(tmp_dir, f"{os.path.basename(out_path)}_frame_000.png")
-    _draw_frame(G, pos, id_to_color, f"{title_prefix} (step 0)", f0)
-    frame_paths.append(f0)
-
-    # incremental frames after each visit
-    for i, node in enumerate(traversal_nodes, start=1):
-        id_to_color[node.id] = palette[i - 1]
-        fi = os.path.join(tmp_dir, f"{os.path.basename(out_path)}_frame_{i:03d}.png")
-        _draw_frame(G, pos, id_to_color, f"{title_prefix} (step {i})", fi)
-        frame_paths.append(fi)
-
-    # combine into GIF
+    steps = [(_node_id(node), color) for node, color in zip(traversal_nodes, palette)]
+
+    if processes == 1:
+        frames = _iter_frames(TraversalRenderer(G, pos), steps, title_prefix, 0, len(steps) + 1)
+    else:
+        processes = processes or os.cpu_count()
+        frames = _iter_frames_parallel(G, pos, steps, title_prefix, processes,
+                                       chunk_size, max_pending or 2 * processes)
+
+    if fmt is not None:
+        palette_image = traversal_palette([color for _, color in steps])
+        save_animation(frames, out_path, palette_image, round(frame_duration * 1000), fmt=fmt)
+        return
+
+    # frames go straight into the GIF writer, in step order
     with imageio.get_writer(out_path, mode='I', duration=frame_duration) as writer:
-        for p in frame_paths:
-            writer.append_data(imageio.imread(p))
+        for frame in frames:
+            writer.append_data(frame)
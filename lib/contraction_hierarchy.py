@@ -0,0 +1,253 @@
+from heapq import heappush, heappop
+from math import inf
+
+import numpy as np
+
+from lib.dijkstra import Graph
+
+
+def _witness_search(src, skip, out_edges, limit, settle_limit, targets):
+    """
+    Local Dijkstra from src that ignores vertex skip (the one being
+    contracted), stops past distance limit or after settle_limit vertices.
+    targets maps vertices to the distance a witness must not exceed; the
+    search also stops once each of them is settled or has such a witness.
+    Returns a dict of tentative distances.
+    """
+    dist = {src: 0}
+    heap = [(0, src)]
+    remaining = {x: bound for x, bound in targets.items() if x != src}
+    settled = 0
+    while heap and settled < settle_limit and remaining:
+        d, v = heappop(heap)
+        if d > dist[v]:
+            continue
+        if d > limit:
+            break
+        settled += 1
+        remaining.pop(v, None)
+        for u, (w, _) in out_edges[v].items():
+            nd = d + w
+            if u != skip and nd < dist.get(u, inf):
+                dist[u] = nd
+                heappush(heap, (nd, u))
+                if nd <= remaining.get(u, -1):
+                    del remaining[u]
+    return dist
+
+
+def _shortcuts(v, out_edges, in_edges, settle_limit):
+    """Shortcuts (u, x, weight) needed to keep u -> v -> x paths once v is removed."""
+    outs = out_edges[v]
+    if not outs or not in_edges[v]:
+        return []
+    max_out = max(w for w, _ in outs.values())
+
+    result = []
+    for u, (w_uv, _) in in_edges[v].items():
+        bounds = {x: w_uv + w_vx for x, (w_vx, _) in outs.items()}
+        dist = _witness_search(u, v, out_edges, w_uv + max_out, settle_limit, bounds)
+        for x, (w_vx, _) in outs.items():
+            via = w_uv + w_vx
+            if x != u and dist.get(x, inf) > via:
+                result.append((u, x, via))
+    return result
+
+
+def _to_csr(rows):
+    """Per-vertex lists of (target, weight, middle) -> CSR arrays sorted by target."""
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(r) for r in rows])
+    flat = [edge for r in rows for edge in sorted(r)]
+    targets = np.array([t for t, _, _ in flat], dtype=np.int64)
+    weights = np.array([w for _, w, _ in flat], dtype=np.float64)
+    middles = np.array([m for _, _, m in flat], dtype=np.int64)
+    return offsets, targets, weights, middles
+
+
+class ContractionHierarchy:
+    """
+    Contraction hierarchies for static graphs.
+
+    Preprocessing contracts vertices one by one in order of importance and
+    adds shortcut edges that preserve shortest paths among the remaining
+    vertices. A query then only runs two small upward searches: forward
+    from the source and backward from the target, each following edges
+    towards higher-ranked vertices.
+
+    Both search graphs are stored in CSR form (as in lib.dijkstra.CSRGraph):
+      up:   row v holds edges v -> x with rank[x] > rank[v]
+      down: row v holds edges u -> v with rank[u] > rank[v], keyed by u
+    Every edge keeps its middle vertex (-1 for an original edge), which is
+    how shortcuts are unpacked into full vertex paths.
+    """
+    def __init__(self, rank, up, down):
+        self.rank = rank
+        self.n = len(rank)
+        self.up = up
+        self.down = down
+
+    @classmethod
+    def build(cls, graph: Graph, settle_limit=500):
+        """
+        Order and contract every vertex of graph.
+        Vertices are ordered by edge difference plus the number of already
+        contracted neighbors, with lazy re-evaluation. settle_limit bounds
+        each witness search; hitting it only adds redundant shortcuts.
+        """
+        n = graph.n
+        out_edges = [dict() for _ in range(n)]  # u -> {x: (weight, middle)}
+        in_edges = [dict() for _ in range(n)]   # x -> {u: (weight, middle)}
+        for u, edges in graph.adj.items():
+            for x, w in edges:
+                if u != x and w < out_edges[u].get(x, (inf,))[0]:
+                    out_edges[u][x] = in_edges[x][u] = (w, -1)
+
+        deleted_neighbors = [0] * n
+
+        def priority(v):
+            """(priority, shortcuts) for contracting v now."""
+            shortcuts = _shortcuts(v, out_edges, in_edges, settle_limit)
+            added = len(shortcuts)
+            return added - len(in_edges[v]) - len(out_edges[v]) + deleted_neighbors[v], shortcuts
+
+        heap = [(priority(v)[0], v) for v in range(n)]
+        heap.sort()
+        rank = np.full(n, -1, dtype=np.int64)
+        up_rows, down_rows = [None] * n, [None] * n
+        order = 0
+        while heap:
+            _, v = heappop(heap)
+
+            # Lazy update: postpone v if it is no longer the cheapest
+            p, shortcuts = priority(v)
+            if heap and p > heap[0][0]:
+                heappush(heap, (p, v))
+                continue
+
+            # Shortcuts from the lazy update are still exact: nothing changed since
+            for u, x, via in shortcuts:
+                if via < out_edges[u].get(x, (inf,))[0]:
+                    out_edges[u][x] = in_edges[x][u] = (via, v)
+
+            # Every remaining neighbor will be ranked above v
+            rank[v] = order
+            order += 1
+            up_rows[v] = [(x, w, m) for x, (w, m) in out_edges[v].items()]
+            down_rows[v] = [(u, w, m) for u, (w, m) in in_edges[v].items()]
+            for x in out_edges[v]:
+                del in_edges[x][v]
+                deleted_neighbors[x] += 1
+            for u in in_edges[v]:
+                del out_edges[u][v]
+                deleted_neighbors[u] += 1
+            out_edges[v], in_edges[v] = {}, {}
+
+        return cls(rank, _to_csr(up_rows), _to_csr(down_rows))
+
+    # =========================
+    # Queries
+    # =========================
+
+    def _edge(self, csr, row, col):
+        """(weight, middle) of the entry for col in CSR row."""
+        offsets, targets, weights, middles = csr
+        s, e = offsets[row], offsets[row + 1]
+        i = s + int(np.searchsorted(targets[s:e], col))
+        return float(weights[i]), int(middles[i])
+
+    def _unpack(self, a, b, middle):
+        """Vertices after a on the original path of edge a -> b (ending with b)."""
+        path = []
+        stack = [(a, b, middle)]
+        while stack:
+            a, b, m = stack.pop()
+            if m == -1:
+                path.append(b)
+                continue
+            # a -> m is stored in m's down row, m -> b in m's up row
+            stack.append((m, b, self._edge(self.up, m, b)[1]))
+            stack.append((a, m, self._edge(self.down, m, a)[1]))
+        return path
+
+    def query(self, src: int, target: int):
+        """
+        Shortest path src -> target via bidirectional upward search.
+
+        Returns:
+          (distance, path) with path as returned by lib.dijkstra.reconstruct_path,
+          or (inf, None) if target is unreachable.
+        """
+        if src == target:
+            return 0, [src]
+
+        dist = ({src: 0}, {target: 0})
+        parent = ({src: -1}, {target: -1})
+        heaps = ([(0, src)], [(0, target)])
+        csrs = (self.up, self.down)
+        best, meet = inf, -1
+
+        while heaps[0] or heaps[1]:
+            if not heaps[1] or (heaps[0] and heaps[0][0][0] <= heaps[1][0][0]):
+                side = 0
+            else:
+                side = 1
+            d, v = heappop(heaps[side])
+            if d >= best:
+                heaps[side].clear()  # nothing cheaper left on this side
+                continue
+            if d > dist[side][v]:
+                continue
+
+            other = dist[1 - side].get(v)
+            if other is not None and d + other < best:
+                best, meet = d + other, v
+
+            offsets, targets, weights, _ = csrs[side]
+            s, e = offsets[v], offsets[v + 1]
+            for u, w in zip(targets[s:e].tolist(), weights[s:e].tolist()):
+                nd = d + w
+                if nd < dist[side].get(u, inf):
+                    dist[side][u] = nd
+                    parent[side][u] = v
+                    heappush(heaps[side], (nd, u))
+
+        if meet == -1:
+            return inf, None
+
+        # Upward chain src -> meet, then meet -> target
+        chain = [meet]
+        while chain[-1] != src:
+            chain.append(parent[0][chain[-1]])
+        chain.reverse()
+        path = [src]
+        for a, b in zip(chain, chain[1:]):
+            path.extend(self._unpack(a, b, self._edge(self.up, a, b)[1]))
+
+        a = meet
+        while a != target:
+            b = parent[1][a]
+            path.extend(self._unpack(a, b, self._edge(self.down, b, a)[1]))
+            a = b
+        return best, path
+
+    # =========================
+    # Serialization
+    # =========================
+
+    def save(self, path):
+        """Store the hierarchy as an .npz file."""
+        np.savez(path, rank=self.rank,
+                 up_offsets=self.up[0], up_targets=self.up[1],
+                 up_weights=self.up[2], up_middles=self.up[3],
+                 down_offsets=self.down[0], down_targets=self.down[1],
+                 down_weights=self.down[2], down_middles=self.down[3])
+
+    @classmethod
+    def load(cls, path):
+        """Load a hierarchy written by save()."""
+        with np.load(path) as data:
+            fields = ("offsets", "targets", "weights", "middles")
+            up = tuple(data[f"up_{f}"] for f in fields)
+            down = tuple(data[f"down_{f}"] for f in fields)
+            return cls(data["rank"], up, down)
@@ -1,23 +1,143 @@
 from heapq import heappush, heappop
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from math import inf
+from operator import itemgetter
+from multiprocessing import Pool, shared_memory
+import os
+import sys
+
+import numpy as np
+
+from lib.priority_queues import LazyHeap
 
 class Graph:
     """Directed weighted graph using adjacency lists."""
     def __init__(self, n):
         self.n = n
         self.adj = defaultdict(list)   # vertex -> list of (neighbor, weight)
+        self.version = 0               # bumped on every mutation
 
     def add_edge(self, u, v, w):
         """Add edge u -> v with weight w (non-negative for Dijkstra)."""
         if w < 0:
             raise ValueError("Dijkstra's algorithm does not support negative weights.")
         self.adj[u].append((v, w))
+        self.version += 1
+
+    def reversed(self):
+        """Return a new Graph with every edge flipped (v -> u)."""
+        rev = Graph(self.n)
+        for u, edges in self.adj.items():
+            for v, w in edges:
+                rev.adj[v].append((u, w))
+        return rev
+
+    def add_edges_bulk(self, u, v, w):
+        """
+        Add many edges given as equal-length arrays (or sequences).
+        Validation is vectorized and each source's adjacency list is
+        extended once instead of once per edge.
+        """
+        u, v, w = _edge_arrays(u, v, w, self.n)
+        order = np.argsort(u, kind="stable")
+        u, v, w = u[order], v[order], w[order]
+        starts = np.flatnonzero(np.r_[True, u[1:] != u[:-1]]) if len(u) else []
+        bounds = list(starts) + [len(u)]
+        for s, e in zip(bounds[:-1], bounds[1:]):
+            self.adj[int(u[s])].extend(zip(v[s:e].tolist(), w[s:e].tolist()))
+        self.version += 1
+
+
+def _edge_arrays(u, v, w, n):
+    """Validate bulk edge input and return it as NumPy arrays."""
+    u = np.asarray(u, dtype=np.int64)
+    v = np.asarray(v, dtype=np.int64)
+    w = np.asarray(w)
+    if not (u.shape == v.shape == w.shape) or u.ndim != 1:
+        raise ValueError("u, v and w must be 1-D arrays of the same length.")
+    if len(u) and (min(u.min(), v.min()) < 0 or max(u.max(), v.max()) >= n):
+        raise ValueError("Edge endpoints must be in range 0..n-1.")
+    if len(w) and w.min() < 0:
+        raise ValueError("Dijkstra's algorithm does not support negative weights.")
+    return u, v, w
+
+
+class CSRGraph:
+    """
+    Directed weighted graph in compressed sparse row form.
+    The out-edges of vertex v are targets[offsets[v]:offsets[v + 1]] with
+    the matching weights, so an edge costs one index and one weight
+    (12 bytes with the default dtypes) instead of a tuple in a list.
+    """
+    def __init__(self, n, offsets, targets, weights):
+        self.n = n
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.version = 0
+
+    @classmethod
+    def from_edges(cls, n, u, v, w, weight_dtype=np.float64):
+        """
+        Build the CSR arrays from edge arrays in one sort.
+        Parallel edges u -> v are collapsed to the lightest one, which does
+        not change any shortest path.
+        """
+        u, v, w = _edge_arrays(u, v, w, n)
+        order = np.lexsort((w, v, u))
+        u, v, w = u[order], v[order], w[order]
+        if len(u):
+            keep = np.r_[True, (u[1:] != u[:-1]) | (v[1:] != v[:-1])]
+            u, v, w = u[keep], v[keep], w[keep]
+
+        index_dtype = np.int32 if n < 2**31 else np.int64
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(u, minlength=n), out=offsets[1:])
+        return cls(n, offsets, v.astype(index_dtype), w.astype(weight_dtype))
+
+    @classmethod
+    def from_graph(cls, graph):
+        """Convert an adjacency-list Graph."""
+        u = [src for src, edges in graph.adj.items() for _ in edges]
+        v = [dst for edges in graph.adj.values() for dst, _ in edges]
+        w = [wt for edges in graph.adj.values() for _, wt in edges]
+        return cls.from_edges(graph.n, u, v, np.asarray(w, dtype=np.float64))
+
+    @property
+    def num_edges(self):
+        return len(self.targets)
 
-def dijkstra(graph: Graph, src: int):
+    def neighbors(self, v):
+        """Return (targets, weights) array views for the out-edges of v."""
+        s, e = self.offsets[v], self.offsets[v + 1]
+        return self.targets[s:e], self.weights[s:e]
+
+    def edge_arrays(self):
+        """Return the edges back as (u, v, w) arrays."""
+        u = np.repeat(np.arange(self.n), np.diff(self.offsets))
+        return u, self.targets, self.weights
+
+    def add_edges_bulk(self, u, v, w):
+        """Merge a batch of edges into the graph and rebuild the CSR arrays once."""
+        old_u, old_v, old_w = self.edge_arrays()
+        u, v, w = _edge_arrays(u, v, w, self.n)
+        rebuilt = CSRGraph.from_edges(
+            self.n, np.concatenate([old_u, u]), np.concatenate([old_v, v]),
+            np.concatenate([old_w, w]), weight_dtype=self.weights.dtype,
+        )
+        self.offsets, self.targets, self.weights = rebuilt.offsets, rebuilt.targets, rebuilt.weights
+        self.version += 1
+
+def dijkstra(graph: Graph, src: int, target=None, queue=None):
     """
     Computes the shortest distances from src to all vertices.
-    Uses a binary heap (heapq) as a min-priority queue.
+    If target is given, the search stops as soon as target is settled;
+    dist/parent are then final only for target and vertices settled before it.
+
+    queue: priority-queue class from lib.priority_queues, called with the
+    vertex count. Defaults to LazyHeap (heapq with lazy deletion); use
+    IndexedDaryHeap for real decrease-key, or
+    functools.partial(BucketQueue, max_weight=C) for integer weights <= C.
 
     Returns:
       dist: list of shortest path distances (inf if unreachable)
@@ -28,20 +148,19 @@ def dijkstra(graph: Graph, src: int):
     parent = [-1] * n
     dist[src] = 0
 
-    # Min-heap of tuples (distance_so_far, vertex)
-    heap = [(0, src)]
+    pq = (queue or LazyHeap)(n)
+    push, pop = pq.push, pq.pop
+    push(src, 0)
 
-    visited = [False] * n  # optional optimization to skip already processed nodes
+    visited = [False] * n  # skips outdated entries left by lazy queues
 
-    while heap:
-        d, v = heappop(heap)
+    while pq:
+        d, v = pop()
         if visited[v]:
             continue
         visited[v] = True
-
-        # Skip outdated entries in the heap
-        if d != dist[v]:
-            continue
+        if v == target:
+            break
 
         # Relax edges
         for u, w in graph.adj[v]:
@@ -49,10 +168,221 @@ def dijkstra(graph: Graph, src: int):
             if nd < dist[u]:
                 dist[u] = nd
                 parent[u] = v
-                heappush(heap, (nd, u))
+                push(u, nd)
 
     return dist, parent
 
+# Rows with at least this many edges are relaxed with array operations;
+# below it, per-call NumPy overhead costs more than a plain Python loop
+VECTOR_MIN_DEGREE = 512
+
+
+def dijkstra_csr(graph: CSRGraph, src: int):
+    """
+    Dijkstra over a CSRGraph.
+    Each settled vertex's out-edges are read as one contiguous slice and
+    relaxed in a scalar loop; very high-degree rows are compared as arrays
+    and only the improved edges are touched in Python.
+
+    Returns:
+      dist: np.ndarray of distances (inf if unreachable)
+      parent: np.ndarray of predecessors (-1 for none)
+    """
+    n = graph.n
+    offsets = graph.offsets.tolist()
+    targets, weights = graph.targets, graph.weights
+    dist = [inf] * n
+    parent = [-1] * n
+    visited = [False] * n
+    dist[src] = 0.0
+
+    heap = [(0.0, src)]
+    while heap:
+        d, v = heappop(heap)
+        if visited[v]:
+            continue
+        visited[v] = True
+
+        s, e = offsets[v], offsets[v + 1]
+        nbrs = targets[s:e].tolist()
+        if e - s < VECTOR_MIN_DEGREE:
+            for u, w in zip(nbrs, weights[s:e].tolist()):
+                nd = d + w
+                if nd < dist[u]:
+                    dist[u] = nd
+                    parent[u] = v
+                    heappush(heap, (nd, u))
+            continue
+
+        # Targets are unique per row, so all edges can be compared at once
+        nd = d + weights[s:e]
+        better = np.flatnonzero(nd < np.array(itemgetter(*nbrs)(dist)))
+        for i, du in zip(better.tolist(), nd[better].tolist()):
+            u = nbrs[i]
+            dist[u] = du
+            parent[u] = v
+            heappush(heap, (du, u))
+
+    return np.array(dist), np.array(parent, dtype=np.int64)
+
+# Per-process graph view attached by _attach_shared_graph
+_shared_graph = None
+_shared_blocks = []
+
+
+def _share_array(arr):
+    """Copy arr into a new shared-memory block; returns (block, spec)."""
+    shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    return shm, (shm.name, arr.shape, arr.dtype.str)
+
+
+def _attach_shared_graph(n, specs):
+    """Pool initializer: map the shared CSR arrays read-only into this process."""
+    global _shared_graph
+    arrays = []
+    for name, shape, dtype in specs:
+        shm = shared_memory.SharedMemory(name=name)
+        _shared_blocks.append(shm)
+        arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        arr.flags.writeable = False
+        arrays.append(arr)
+    _shared_graph = CSRGraph(n, *arrays)
+
+
+def _sssp_row(task):
+    row, src = task
+    dist, _ = dijkstra_csr(_shared_graph, src)
+    return row, dist
+
+
+def _fill_rows_parallel(csr, sources, result, processes, chunksize):
+    """Compute result[i] = distances from sources[i] in a pool over the shared CSR arrays."""
+    blocks, specs = [], []
+    try:
+        for arr in (csr.offsets, csr.targets, csr.weights):
+            shm, spec = _share_array(np.ascontiguousarray(arr))
+            blocks.append(shm)
+            specs.append(spec)
+
+        with Pool(processes, initializer=_attach_shared_graph, initargs=(csr.n, specs)) as pool:
+            for row, dist in pool.imap_unordered(_sssp_row, enumerate(sources), chunksize=chunksize):
+                result[row] = dist
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+
+def multi_source_dijkstra(graph, sources, processes=None, out_path=None, chunksize=1):
+    """
+    Distance matrix for many sources, one single-source search per row.
+
+    The graph is converted to CSR once and its arrays are placed in shared
+    memory, which every worker maps read-only; only (row, dist) results
+    travel back, and they are written into the matrix as they arrive.
+
+    Args:
+        graph: Graph or CSRGraph
+        sources: sequence of source vertices (row i is sources[i])
+        processes: pool size (default: os.cpu_count())
+        out_path: if given, the matrix is a .npy file opened as a memmap,
+                  for matrices larger than RAM
+        chunksize: sources handed to a worker at a time
+
+    Returns:
+        np.ndarray (or np.memmap) of shape (len(sources), n), inf if unreachable
+    """
+    csr = graph if isinstance(graph, CSRGraph) else CSRGraph.from_graph(graph)
+    sources = list(sources)
+    shape = (len(sources), csr.n)
+    if out_path is not None:
+        result = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float64, shape=shape)
+    else:
+        result = np.empty(shape, dtype=np.float64)
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        for row, src in enumerate(sources):
+            result[row] = dijkstra_csr(csr, src)[0]
+    else:
+        _fill_rows_parallel(csr, sources, result, processes, chunksize)
+
+    if out_path is not None:
+        result.flush()
+    return result
+
+
+class ShortestPathCache:
+    """
+    LRU cache of shortest-path trees (dist, parent) keyed by source.
+
+    Trees are recomputed only on a miss. The cache remembers graph.version
+    and drops every tree as soon as the graph has been mutated. Cached trees
+    are shared with callers and must be treated as read-only.
+    """
+    def __init__(self, graph, max_bytes=256 * 2**20):
+        self.graph = graph
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._trees = OrderedDict()  # src -> (dist, parent, nbytes)
+        self._version = graph.version
+
+    @staticmethod
+    def _tree_bytes(dist, parent):
+        if isinstance(dist, np.ndarray):
+            return dist.nbytes + parent.nbytes
+        # List slots plus one float object per distance (approximate)
+        return sys.getsizeof(dist) + sys.getsizeof(parent) + 24 * len(dist)
+
+    def __len__(self):
+        return len(self._trees)
+
+    def clear(self):
+        self._trees.clear()
+        self.nbytes = 0
+        self._version = self.graph.version
+
+    def get(self, src):
+        """Return (dist, parent) for src, computing and caching it on a miss."""
+        if self.graph.version != self._version:
+            self.clear()
+
+        entry = self._trees.get(src)
+        if entry is not None:
+            self.hits += 1
+            self._trees.move_to_end(src)
+            return entry[0], entry[1]
+
+        self.misses += 1
+        if isinstance(self.graph, CSRGraph):
+            dist, parent = dijkstra_csr(self.graph, src)
+        else:
+            dist, parent = dijkstra(self.graph, src)
+
+        size = self._tree_bytes(dist, parent)
+        if size <= self.max_bytes:
+            while self._trees and self.nbytes + size > self.max_bytes:
+                _, (_, _, old) = self._trees.popitem(last=False)
+                self.nbytes -= old
+            self._trees[src] = (dist, parent, size)
+            self.nbytes += size
+        return dist, parent
+
+    def path(self, src, target):
+        """(distance, path) from the cached tree of src, or (inf, None) if unreachable."""
+        dist, parent = self.get(src)
+        if dist[target] == inf:
+            return inf, None
+        return dist[target], reconstruct_path(parent, src, target)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "entries": len(self._trees), "nbytes": self.nbytes}
+
+
 def reconstruct_path(parent, src, target):
     """Reconstructs one of the shortest paths src -> target using the parent array."""
     if parent[target] == -1 and src != target:
@@ -63,6 +393,249 @@ def reconstruct_path(parent, src, target):
         path.append(cur)
         if cur == src:
             break
-        cur = parent[cur]
+        cur = int(parent[cur])
     path.reverse()
     return path
+
+
+def update_dijkstra(graph, dist, parent, new_edges):
+    """
+    Repair a dijkstra() result after edges were added or made cheaper.
+
+    new_edges: (u, v, w) edges that are already in graph (e.g. just added
+    with add_edge; a lower weight for an existing pair is a parallel edge).
+    Distances can only decrease, so it is enough to relax the new edges and
+    re-run Dijkstra from the vertices they improved; untouched parts of the
+    tree are never visited. Weight increases and deletions are not handled.
+
+    Works on Graph with list results and on CSRGraph with array results.
+
+    Returns:
+      updated copies of (dist, parent)
+    """
+    is_csr = isinstance(graph, CSRGraph)
+    if is_csr:
+        dist, parent = np.array(dist, dtype=np.float64), np.array(parent, dtype=np.int64)
+    else:
+        dist, parent = list(dist), list(parent)
+
+    heap = []
+    for u, v, w in new_edges:
+        nd = dist[u] + w
+        if nd < dist[v]:
+            dist[v] = nd
+            parent[v] = u
+            heappush(heap, (nd, v))
+
+    while heap:
+        d, v = heappop(heap)
+        if d > dist[v]:
+            continue  # outdated entry
+        if is_csr:
+            targets, weights = graph.neighbors(v)
+            edges = zip(targets.tolist(), weights.tolist())
+        else:
+            edges = graph.adj[v]
+        for u, w in edges:
+            nd = d + w
+            if nd < dist[u]:
+                dist[u] = nd
+                parent[u] = v
+                heappush(heap, (nd, u))
+
+    return dist, parent
+
+def shortest_path(graph: Graph, src: int, target: int):
+    """
+    Point-to-point query: Dijkstra from src that stops once target is settled.
+
+    Returns:
+      (distance, path) with path as returned by reconstruct_path,
+      or (inf, None) if target is unreachable.
+    """
+    dist, parent = dijkstra(graph, src, target=target)
+    if dist[target] == inf:
+        return inf, None
+    return dist[target], reconstruct_path(parent, src, target)
+
+
+def bidirectional_dijkstra(graph: Graph, src: int, target: int, reverse_graph: Graph = None):
+    """
+    Point-to-point query searching forward from src and backward from target.
+    The backward search runs on reverse_graph (graph.reversed()); pass it in
+    when issuing many queries so it is built only once.
+    The search stops when the two frontiers' minimum keys add up to at least
+    the best meeting distance found so far.
+
+    Returns:
+      (distance, path), or (inf, None) if target is unreachable.
+    """
+    if src == target:
+        return 0, [src]
+    if reverse_graph is None:
+        reverse_graph = graph.reversed()
+
+    n = graph.n
+    dist = ([inf] * n, [inf] * n)
+    parent = ([-1] * n, [-1] * n)
+    visited = ([False] * n, [False] * n)
+    heaps = ([(0, src)], [(0, target)])
+    adjs = (graph.adj, reverse_graph.adj)
+    dist[0][src] = dist[1][target] = 0
+
+    best, meet = inf, -1
+    while heaps[0] and heaps[1]:
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+
+        # Expand the side with the smaller frontier key
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        d, v = heappop(heaps[side])
+        if visited[side][v]:
+            continue
+        visited[side][v] = True
+
+        my_dist, other_dist = dist[side], dist[1 - side]
+        for u, w in adjs[side][v]:
+            nd = d + w
+            if nd < my_dist[u]:
+                my_dist[u] = nd
+                parent[side][u] = v
+                heappush(heaps[side], (nd, u))
+            if nd + other_dist[u] < best:
+                best, meet = nd + other_dist[u], u
+
+    if meet == -1:
+        return inf, None
+
+    forward = reconstruct_path(parent[0], src, meet)
+    backward = reconstruct_path(parent[1], target, meet)  # target ... meet
+    return best, forward + backward[-2::-1]
+
+
+def astar(graph: Graph, src: int, target: int, heuristic=None):
+    """
+    A* point-to-point search.
+    heuristic(v) must be admissible: a lower bound on the distance v -> target.
+    With no heuristic this is Dijkstra with early exit. Vertices may be
+    re-expanded, so admissible but inconsistent heuristics stay correct.
+
+    Returns:
+      (distance, path), or (inf, None) if target is unreachable.
+    """
+    if heuristic is None:
+        heuristic = lambda v: 0
+
+    n = graph.n
+    dist = [inf] * n
+    parent = [-1] * n
+    dist[src] = 0
+
+    # Min-heap of (distance_so_far + heuristic, distance_so_far, vertex)
+    heap = [(heuristic(src), 0, src)]
+    while heap:
+        _, d, v = heappop(heap)
+        if d > dist[v]:
+            continue
+        if v == target:
+            return d, reconstruct_path(parent, src, target)
+
+        for u, w in graph.adj[v]:
+            nd = d + w
+            if nd < dist[u]:
+                h = heuristic(u)
+                if h == inf:
+                    # u provably cannot reach target; with Landmarks this is an
+                    # inf - finite bound (e.g. L reaches u but not target)
+                    continue
+                dist[u] = nd
+                parent[u] = v
+                heappush(heap, (nd + h, nd, u))
+
+    return inf, None
+
+
+class Landmarks:
+    """
+    ALT preprocessing: exact distances from and to a few landmark vertices.
+    By the triangle inequality, for every landmark L
+        d(v, t) >= d(L, t) - d(L, v)   and   d(v, t) >= d(v, L) - d(t, L),
+    which gives an admissible A* heuristic on any graph, no coordinates needed.
+    """
+    def __init__(self, landmarks, from_dist, to_dist):
+        self.landmarks = np.asarray(landmarks, dtype=np.int64)
+        # One row per vertex, so h(v) reads two short contiguous rows
+        self.from_dist = np.ascontiguousarray(from_dist, dtype=np.float64)  # (n, k): d(L, v)
+        self.to_dist = np.ascontiguousarray(to_dist, dtype=np.float64)      # (n, k): d(v, L)
+
+    @classmethod
+    def build(cls, graph: Graph, k=4, reverse_graph: Graph = None, start=0):
+        """
+        Pick k landmarks by farthest-point selection and run Dijkstra from
+        each one on the graph and on its reverse.
+        """
+        if reverse_graph is None:
+            reverse_graph = graph.reversed()
+
+        landmarks, from_rows, to_rows = [], [], []
+        # Distance to the nearest chosen landmark (from start before the first pick)
+        spread = np.asarray(dijkstra(graph, start)[0], dtype=np.float64)
+        for _ in range(min(k, graph.n)):
+            # Farthest reachable vertex from the landmarks chosen so far
+            reachable = np.where(np.isfinite(spread), spread, -1.0)
+            reachable[landmarks] = -1.0
+            lm = int(np.argmax(reachable))
+            if reachable[lm] < 0:
+                break
+            landmarks.append(lm)
+            from_rows.append(dijkstra(graph, lm)[0])
+            to_rows.append(dijkstra(reverse_graph, lm)[0])
+            row = np.asarray(from_rows[-1], dtype=np.float64)
+            spread = row if len(landmarks) == 1 else np.minimum(spread, row)
+
+        n = graph.n
+        return cls(landmarks,
+                   np.array(from_rows, dtype=np.float64).reshape(-1, n).T,
+                   np.array(to_rows, dtype=np.float64).reshape(-1, n).T)
+
+    @property
+    def n(self):
+        return self.from_dist.shape[0]
+
+    def heuristic(self, target):
+        """Return h(v), the best landmark lower bound on d(v, target)."""
+        from_rows, to_rows = self.from_dist, self.to_dist
+        from_t = from_rows[target].tolist()
+        to_t = to_rows[target].tolist()
+
+        def h(v):
+            # Plain floats: k is small, so scalar Python beats NumPy call overhead.
+            # inf - finite = inf proves v cannot reach target (astar prunes it);
+            # inf - inf = nan says nothing and fails every comparison.
+            best = 0.0
+            for ft, fv in zip(from_t, from_rows[v].tolist()):
+                if ft - fv > best:
+                    best = ft - fv
+            for vt, tt in zip(to_rows[v].tolist(), to_t):
+                if vt - tt > best:
+                    best = vt - tt
+            return best
+
+        return h
+
+    def query(self, graph: Graph, src: int, target: int):
+        """A* with the landmark heuristic. Returns (distance, path)."""
+        return astar(graph, src, target, self.heuristic(target))
+
+    def save(self, path):
+        """Store the tables as an .npz file."""
+        np.savez(path, landmarks=self.landmarks, from_dist=self.from_dist, to_dist=self.to_dist)
+
+    @classmethod
+    def load(cls, path, graph: Graph = None):
+        """Load tables written by save(); optionally check them against graph."""
+        with np.load(path) as data:
+            lm = cls(data["landmarks"], data["from_dist"], data["to_dist"])
+        if graph is not None and lm.n != graph.n:
+            raise ValueError(f"Landmark tables are for {lm.n} vertices, graph has {graph.n}.")
+        return lm
@@ -0,0 +1,105 @@
+"""
+External-memory (out-of-core) sorting.
+Input larger than the in-memory budget is cut into sorted runs that are
+spilled to temporary files, then streamed back through a k-way merge.
+"""
+import os
+import pickle
+import shutil
+import tempfile
+from array import array
+from itertools import islice
+
+from lib.linked_list import merge_sorted_iter
+
+BLOCK_SIZE = 65536  # items per on-disk block
+
+
+def _write_run(items, path, typecode=None):
+    """
+    Write a sorted run in blocks.
+    With a typecode blocks are raw machine values (array.tofile),
+    otherwise each block is one pickled list.
+    """
+    with open(path, "wb") as f:
+        for start in range(0, len(items), BLOCK_SIZE):
+            block = items[start:start + BLOCK_SIZE]
+            if typecode:
+                array(typecode, block).tofile(f)
+            else:
+                pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_run(path, typecode=None):
+    """Stream a run back one block at a time."""
+    with open(path, "rb") as f:
+        while True:
+            if typecode:
+                block = array(typecode)
+                try:
+                    block.fromfile(f, BLOCK_SIZE)
+                except EOFError:
+                    # fromfile keeps the items it managed to read
+                    yield from block
+                    return
+            else:
+                try:
+                    block = pickle.load(f)
+                except EOFError:
+                    return
+            yield from block
+
+
+def _merge_runs(paths, tmp_dir, key, reverse, typecode):
+    try:
+        yield from merge_sorted_iter(
+            *(_read_run(p, typecode) for p in paths), key=key, reverse=reverse
+        )
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def external_sort(iterable, key=None, reverse=False, max_in_memory=1_000_000,
+                  typecode=None, tmp_dir=None):
+    """
+    Sort an iterable that may not fit in memory.
+
+    The input is consumed immediately: every max_in_memory items are sorted
+    and spilled to a run file under tmp_dir. The returned iterator lazily
+    merges the runs (stable, O(n log k)) and removes the files when done.
+    If the whole input fits in one run, nothing touches the disk.
+
+    Args:
+        iterable: values to sort
+        key, reverse: as for sorted()
+        max_in_memory: maximum number of items held in memory at once
+        typecode: optional array typecode (e.g. "q", "d") for numeric data;
+                  runs are then stored as raw values instead of pickles
+        tmp_dir: parent directory for run files (system default if None)
+
+    Returns:
+        iterator over the sorted values
+    """
+    if max_in_memory < 1:
+        raise ValueError("max_in_memory must be positive.")
+
+    it = iter(iterable)
+    chunk = list(islice(it, max_in_memory))
+    chunk.sort(key=key, reverse=reverse)
+    if len(chunk) < max_in_memory:
+        return iter(chunk)
+
+    run_dir = tempfile.mkdtemp(prefix="extsort_", dir=tmp_dir)
+    paths = []
+    try:
+        while chunk:
+            path = os.path.join(run_dir, f"run_{len(paths):05d}.bin")
+            _write_run(chunk, path, typecode)
+            paths.append(path)
+            chunk = list(islice(it, max_in_memory))
+            chunk.sort(key=key, reverse=reverse)
+    except BaseException:
+        shutil.rmtree(run_dir, ignore_errors=True)
+        raise
+
+    return _merge_runs(paths, run_dir, key, reverse, typecode)
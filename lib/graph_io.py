@@ -0,0 +1,226 @@
+"""
+Streaming graph loaders and a memory-mapped CSR cache.
+
+Edge lists are read in fixed-size chunks straight into NumPy arrays and
+converted once into a cache directory of .npy files (offsets, targets,
+weights) plus meta.json. Later runs open the cache with mmap in near-zero
+time instead of reparsing the source.
+
+Supported sources:
+  text:   one edge per line, "u v [w]" separated by whitespace or a
+          delimiter such as ","; lines starting with "#" are skipped;
+          a missing weight counts as 1
+  binary: packed little-endian records of EDGE_DTYPE (int32 u, int32 v, float64 w)
+"""
+import json
+import os
+import warnings
+
+import numpy as np
+
+from lib.dijkstra import CSRGraph
+
+EDGE_DTYPE = np.dtype([("u", "<i4"), ("v", "<i4"), ("w", "<f8")])
+CACHE_VERSION = 2
+
+
+# =========================
+# Chunked readers
+# =========================
+
+def iter_text_edges(path, delimiter=None, chunk_size=1_000_000):
+    """Yield (u, v, w) arrays for up to chunk_size lines of a text edge list."""
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")  # loadtxt warns on the empty tail
+                block = np.loadtxt(f, delimiter=delimiter, comments="#",
+                                   max_rows=chunk_size, ndmin=2, dtype=np.float64)
+            if block.size == 0:
+                return
+            if block.shape[1] not in (2, 3):
+                raise ValueError(f"{path}: expected 2 or 3 columns, got {block.shape[1]}.")
+            w = block[:, 2] if block.shape[1] == 3 else np.ones(len(block))
+            yield block[:, 0].astype(np.int64), block[:, 1].astype(np.int64), w
+
+
+def iter_binary_edges(path, chunk_size=1_000_000):
+    """Yield (u, v, w) arrays for up to chunk_size records of a binary edge file."""
+    with open(path, "rb") as f:
+        while True:
+            records = np.fromfile(f, dtype=EDGE_DTYPE, count=chunk_size)
+            if len(records) == 0:
+                return
+            yield records["u"].astype(np.int64), records["v"].astype(np.int64), records["w"]
+
+
+def write_binary_edges(path, u, v, w):
+    """Write edge arrays in the binary format read by iter_binary_edges."""
+    records = np.empty(len(u), dtype=EDGE_DTYPE)
+    records["u"], records["v"], records["w"] = u, v, w
+    records.tofile(path)
+
+
+def _iter_edges(path, fmt, delimiter, chunk_size):
+    if fmt == "text":
+        return iter_text_edges(path, delimiter=delimiter, chunk_size=chunk_size)
+    if fmt == "binary":
+        return iter_binary_edges(path, chunk_size=chunk_size)
+    raise ValueError(f"Unknown edge list format: {fmt!r} (use 'text' or 'binary').")
+
+
+# =========================
+# CSR cache
+# =========================
+
+def _source_stamp(path, n, fmt, delimiter):
+    """What a cache was built from: the source file's identity plus the parse options."""
+    st = os.stat(path)
+    return {"source": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+            "requested_n": n, "format": fmt, "delimiter": delimiter}
+
+
+def _dedupe_rows(offsets, targets, weights, chunk_size):
+    """
+    Sort every row by target and keep only the lightest of parallel edges
+    (CSRGraph rows must have unique targets). Works on blocks of rows and
+    compacts the arrays in place. Returns the new offsets.
+    """
+    n = len(offsets) - 1
+    new_offsets = np.zeros(n + 1, dtype=np.int64)
+    write = 0
+    a = 0
+    while a < n:
+        # Rows a..b-1 with roughly chunk_size edges (at least one row)
+        b = int(np.searchsorted(offsets, offsets[a] + chunk_size, side="right")) - 1
+        b = min(max(b, a + 1), n)
+        s, e = offsets[a], offsets[b]
+        rows = np.repeat(np.arange(a, b), np.diff(offsets[a:b + 1]))
+        t, w = np.array(targets[s:e]), np.array(weights[s:e])
+
+        order = np.lexsort((w, t, rows))
+        rows, t, w = rows[order], t[order], w[order]
+        if len(rows):
+            keep = np.r_[True, (rows[1:] != rows[:-1]) | (t[1:] != t[:-1])]
+            rows, t, w = rows[keep], t[keep], w[keep]
+
+        targets[write:write + len(t)] = t
+        weights[write:write + len(w)] = w
+        new_offsets[a + 1:b + 1] = write + np.cumsum(np.bincount(rows - a, minlength=b - a))
+        write += len(t)
+        a = b
+    return new_offsets
+
+
+def build_csr_cache(path, cache_dir, fmt="text", n=None, delimiter=None, chunk_size=1_000_000):
+    """
+    Convert an edge list into a CSR cache directory in two streaming passes.
+
+    Pass 1 counts out-degrees (and finds n if not given); pass 2 scatters
+    each chunk into memory-mapped targets/weights arrays at its rows'
+    cursors. Rows are then sorted and parallel edges collapsed to the
+    lightest. Only the offsets and one chunk are ever held in memory.
+
+    Returns:
+        cache_dir
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    requested_n = n
+
+    # Pass 1: degrees
+    degrees = np.zeros(n or 0, dtype=np.int64)
+    max_id = -1
+    for u, v, w in _iter_edges(path, fmt, delimiter, chunk_size):
+        if len(w) and w.min() < 0:
+            raise ValueError("Dijkstra's algorithm does not support negative weights.")
+        if min(u.min(), v.min()) < 0:
+            raise ValueError("Vertex ids must be non-negative.")
+        max_id = max(max_id, int(u.max()), int(v.max()))
+        counts = np.bincount(u)
+        if len(counts) > len(degrees):
+            if n is not None:
+                raise ValueError(f"Vertex id {len(counts) - 1} out of range for n={n}.")
+            degrees = np.concatenate([degrees, np.zeros(len(counts) - len(degrees), dtype=np.int64)])
+        degrees[:len(counts)] += counts
+
+    if n is None:
+        n = max_id + 1
+    elif max_id >= n:
+        raise ValueError(f"Vertex id {max_id} out of range for n={n}.")
+    degrees = np.concatenate([degrees, np.zeros(n - len(degrees), dtype=np.int64)])
+
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(degrees, out=offsets[1:])
+    m = int(offsets[-1])
+    index_dtype = np.int32 if n < 2**31 else np.int64
+
+    tmp_targets = os.path.join(cache_dir, "targets.tmp.npy")
+    tmp_weights = os.path.join(cache_dir, "weights.tmp.npy")
+    targets = np.lib.format.open_memmap(tmp_targets, mode="w+", dtype=index_dtype, shape=(m,))
+    weights = np.lib.format.open_memmap(tmp_weights, mode="w+", dtype=np.float64, shape=(m,))
+
+    # Pass 2: scatter every edge to its row's next free slot
+    cursor = offsets[:-1].copy()
+    for u, v, w in _iter_edges(path, fmt, delimiter, chunk_size):
+        order = np.argsort(u, kind="stable")
+        u, v, w = u[order], v[order], w[order]
+        rank_in_row = np.arange(len(u)) - np.searchsorted(u, u, side="left")
+        slots = cursor[u] + rank_in_row
+        targets[slots] = v
+        weights[slots] = w
+        cursor += np.bincount(u, minlength=n)
+
+    offsets = _dedupe_rows(offsets, targets, weights, chunk_size)
+    m = int(offsets[-1])
+
+    # Write the final, exactly sized arrays
+    np.save(os.path.join(cache_dir, "offsets.npy"), offsets)
+    for name, arr in (("targets", targets), ("weights", weights)):
+        out = np.lib.format.open_memmap(os.path.join(cache_dir, f"{name}.npy"),
+                                        mode="w+", dtype=arr.dtype, shape=(m,))
+        for s in range(0, m, chunk_size):
+            e = min(s + chunk_size, m)
+            out[s:e] = arr[s:e]
+        out.flush()
+        del out
+    del targets, weights
+    os.remove(tmp_targets)
+    os.remove(tmp_weights)
+
+    meta = {"version": CACHE_VERSION, "n": n, "num_edges": m,
+            **_source_stamp(path, requested_n, fmt, delimiter)}
+    with open(os.path.join(cache_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return cache_dir
+
+
+def open_csr_cache(cache_dir):
+    """Open a CSR cache as a CSRGraph whose arrays are read-only memory maps."""
+    with open(os.path.join(cache_dir, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    arrays = [np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode="r")
+              for name in ("offsets", "targets", "weights")]
+    return CSRGraph(meta["n"], *arrays)
+
+
+def _cache_is_fresh(path, cache_dir, n, fmt, delimiter):
+    meta_path = os.path.join(cache_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    stamp = _source_stamp(path, n, fmt, delimiter)
+    return meta.get("version") == CACHE_VERSION and all(meta.get(k) == stamp[k] for k in stamp)
+
+
+def load_graph(path, cache_dir=None, fmt="text", n=None, delimiter=None, chunk_size=1_000_000):
+    """
+    Load an edge list as a CSRGraph, going through the mmap cache.
+    The cache (default: "<path>.csr") is rebuilt when the source file's size
+    or modification time, or the n/fmt/delimiter it was built with, no
+    longer match.
+    """
+    cache_dir = cache_dir or path + ".csr"
+    if not _cache_is_fresh(path, cache_dir, n, fmt, delimiter):
+        build_csr_cache(path, cache_dir, fmt=fmt, n=n, delimiter=delimiter, chunk_size=chunk_size)
+    return open_csr_cache(cache_dir)
@@ -1,33 +1,77 @@
+from array import array
+from operator import attrgetter
+from heapq import merge as heap_merge
+
+
 class Node:
+    __slots__ = ("data", "next")
+
     def __init__(self, data):
         self.data = data
         self.next = None
 
 class LinkedList:
-    def __init__(self):
+    def __init__(self, iterable=None):
         self.head = None
+        self.tail = None
+        self.size = 0
+        if iterable is not None:
+            self.extend(iterable)
+
+    @classmethod
+    def from_iterable(cls, iterable):
+        """Build a list from any iterable in a single linear pass."""
+        return cls(iterable)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        current = self.head
+        while current:
+            yield current.data
+            current = current.next
 
     def append(self, data):
         new_node = Node(data)
         if not self.head:
             self.head = new_node
+        else:
+            self.tail.next = new_node
+        self.tail = new_node
+        self.size += 1
+
+    def extend(self, iterable):
+        """Append every item of iterable, linking nodes through a local tail."""
+        dummy = Node(None)
+        last = dummy
+        count = 0
+        for data in iterable:
+            node = Node(data)
+            last.next = node
+            last = node
+            count += 1
+
+        if count == 0:
             return
-        last = self.head
-        while last.next:
-            last = last.next
-        last.next = new_node
+        if self.head:
+            self.tail.next = dummy.next
+        else:
+            self.head = dummy.next
+        self.tail = last
+        self.size += count
+
+    def clear(self):
+        self.head = self.tail = None
+        self.size = 0
 
     def print_list(self):
-        current = self.head
-        elements = []
-        while current:
-            elements.append(current.data)
-            current = current.next
-        print(" -> ".join(map(str, elements)))
+        print(" -> ".join(map(str, self)))
 
     def reverse(self):
         prev = None
         current = self.head
+        self.tail = current
         while current:
             next_node = current.next
             current.next = prev
@@ -35,45 +79,295 @@ class LinkedList:
             current = next_node
         self.head = prev
 
-    def _merge_sort(self, head):
-        if not head or not head.next:
-            return head
+    MIN_RUN = 32
+
+    def _natural_runs(self, keyed, reverse):
+        """
+        Split the list into maximal sorted runs, like timsort does.
+        Non-decreasing runs are kept as-is; strictly decreasing runs are
+        reversed in place (strictness keeps equal items in their order).
+        Runs shorter than MIN_RUN are topped up with the following nodes and
+        sorted as a small block, which saves the first few merge passes.
+        Returns a list of (head, tail) pairs with detached tails.
+        """
+        runs = []
+        node = self.head
+        while node:
+            head = node
+            length = 1
+            k_prev = node.data[0] if keyed else node.data
+            node = node.next
+            if node:
+                k_cur = node.data[0] if keyed else node.data
 
-        # Find middle using slow/fast pointer
-        slow, fast = head, head.next
+            if node and ((k_prev < k_cur) if reverse else (k_cur < k_prev)):
+                # Descending run: reverse links while walking it
+                prev = head
+                while True:
+                    next_node = node.next
+                    node.next = prev
+                    prev, k_prev = node, k_cur
+                    length += 1
+                    node = next_node
+                    if not node:
+                        break
+                    k_cur = node.data[0] if keyed else node.data
+                    if not ((k_prev < k_cur) if reverse else (k_cur < k_prev)):
+                        break
+                head.next = node
+                head, tail = prev, head
+            else:
+                tail = head
+                while node:
+                    if (k_prev < k_cur) if reverse else (k_cur < k_prev):
+                        break
+                    tail, k_prev = node, k_cur
+                    length += 1
+                    node = node.next
+                    if node:
+                        k_cur = node.data[0] if keyed else node.data
 
-        while fast and fast.next:
-            slow = slow.next
-            fast = fast.next.next
+            if length < self.MIN_RUN and node:
+                head, tail, node = self._sort_block(head, node, keyed, reverse)
+            tail.next = None
+            runs.append((head, tail))
+        return runs
 
-        # If odd length, slow is middle element
-        mid = slow.next
-        slow.next = None
-        left = self._merge_sort(head)
-        right = self._merge_sort(mid)
+    def _sort_block(self, head, node, keyed, reverse):
+        """
+        Sort the short run starting at head together with up to MIN_RUN
+        nodes taken from node onwards. Returns (head, tail, next node).
+        """
+        block = []
+        current = head
+        while current is not node and len(block) < self.MIN_RUN:
+            block.append(current)
+            current = current.next
+        current = node
+        while current and len(block) < self.MIN_RUN:
+            block.append(current)
+            current = current.next
 
-        return self._merge(left, right)
+        if keyed:
+            block.sort(key=lambda n: n.data[0], reverse=reverse)
+        else:
+            block.sort(key=attrgetter("data"), reverse=reverse)
+        for a, b in zip(block, block[1:]):
+            a.next = b
+        return block[0], block[-1], current
 
-    def _merge(self, l1, l2):
-        dummy = Node(0)
+    def _merge_runs(self, left, right, keyed, reverse):
+        """Stable merge of two runs: take from the right only if strictly smaller."""
+        dummy = Node(None)
         curr = dummy
+        h1, h2 = left[0], right[0]
+        k1 = h1.data[0] if keyed else h1.data
+        k2 = h2.data[0] if keyed else h2.data
 
-        while l1 and l2:
-            if l1.data < l2.data:
-                curr.next = l1
-                l1 = l1.next
+        while True:
+            if (k1 < k2) if reverse else (k2 < k1):
+                curr.next = curr = h2
+                h2 = h2.next
+                if not h2:
+                    curr.next = h1
+                    return dummy.next, left[1]
+                k2 = h2.data[0] if keyed else h2.data
             else:
-                curr.next = l2
-                l2 = l2.next
-            curr = curr.next
+                curr.next = curr = h1
+                h1 = h1.next
+                if not h1:
+                    curr.next = h2
+                    return dummy.next, right[1]
+                k1 = h1.data[0] if keyed else h1.data
+
+    def _drain(self):
+        """Yield values front to back, unlinking each node as it is consumed."""
+        while self.head:
+            node = self.head
+            self.head = node.next
+            self.size -= 1
+            yield node.data
+        self.tail = None
+
+    def sort(self, key=None, reverse=False, max_in_memory=None, typecode=None, tmp_dir=None):
+        """
+        Stable, iterative natural merge sort.
+        Detects existing ascending/descending runs and merges them pairwise
+        bottom-up, so (nearly) sorted input costs close to O(n).
+
+        If max_in_memory is set and the list is longer, the list is drained
+        into sorted runs on disk (see lib.external_sort) and rebuilt from
+        their streaming merge instead.
+        """
+        if max_in_memory is not None and self.size > max_in_memory:
+            from lib.external_sort import external_sort
+            merged = external_sort(self._drain(), key=key, reverse=reverse,
+                                   max_in_memory=max_in_memory, typecode=typecode,
+                                   tmp_dir=tmp_dir)
+            self.extend(merged)
+            return
+
+        if key is None:
+            self._merge_sort(False, reverse)
+            return
+
+        # Call key once per node, like sorted(): nodes hold (key, data)
+        # while they are sorted and get their data back afterwards
+        nodes = []
+        try:
+            node = self.head
+            while node:
+                node.data = (key(node.data), node.data)
+                nodes.append(node)
+                node = node.next
+            self._merge_sort(True, reverse)
+        finally:
+            for node in nodes:
+                node.data = node.data[1]
+
+    def _merge_sort(self, keyed, reverse):
+        """Bottom-up merge of the natural runs; keyed means data holds (key, value)."""
+        runs = self._natural_runs(keyed, reverse)
+        while len(runs) > 1:
+            merged = [self._merge_runs(runs[i], runs[i + 1], keyed, reverse)
+                      for i in range(0, len(runs) - 1, 2)]
+            if len(runs) % 2:
+                merged.append(runs[-1])
+            runs = merged
+
+        if runs:
+            self.head, self.tail = runs[0]
+
+class ArrayLinkedList:
+    """
+    Singly linked list stored as a struct of arrays.
+    Node i keeps its value in data[i] and the index of its successor in
+    next[i] (-1 terminates the chain), so there is no per-node Python object.
+    With a typecode (e.g. "q" or "d") values live in a typed array as well.
+    """
+    def __init__(self, iterable=None, typecode=None):
+        self.typecode = typecode
+        self.data = array(typecode) if typecode else []
+        self.next = array("q")
+        self.head = -1
+        self.tail = -1
+        self.size = 0
+        if iterable is not None:
+            self.extend(iterable)
+
+    @classmethod
+    def from_iterable(cls, iterable, typecode=None):
+        return cls(iterable, typecode=typecode)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        data, nxt = self.data, self.next
+        i = self.head
+        while i != -1:
+            yield data[i]
+            i = nxt[i]
+
+    def append(self, data):
+        idx = len(self.data)
+        self.data.append(data)
+        self.next.append(-1)
+        if self.head == -1:
+            self.head = idx
+        else:
+            self.next[self.tail] = idx
+        self.tail = idx
+        self.size += 1
+
+    def extend(self, iterable):
+        """Append items as one contiguous block of slots linked i -> i + 1."""
+        start = len(self.data)
+        self.data.extend(iterable)
+        end = len(self.data)
+        if end == start:
+            return
+        self.next.extend(range(start + 1, end + 1))
+        self.next[end - 1] = -1
+        if self.head == -1:
+            self.head = start
+        else:
+            self.next[self.tail] = start
+        self.tail = end - 1
+        self.size += end - start
+
+    def clear(self):
+        self.data = array(self.typecode) if self.typecode else []
+        self.next = array("q")
+        self.head = self.tail = -1
+        self.size = 0
+
+    def print_list(self):
+        print(" -> ".join(map(str, self)))
+
+    def reverse(self):
+        nxt = self.next
+        prev = -1
+        current = self.head
+        self.tail = current
+        while current != -1:
+            next_node = nxt[current]
+            nxt[current] = prev
+            prev = current
+            current = next_node
+        self.head = prev
+
+    def _rebuild(self, values):
+        # Rewrite the columns in list order, which also drops unlinked slots
+        self.clear()
+        self.extend(values)
+
+    def sort(self, key=None, reverse=False, max_in_memory=None, tmp_dir=None):
+        if max_in_memory is not None and self.size > max_in_memory:
+            from lib.external_sort import external_sort
+            # Runs are spilled before the columns are rebuilt
+            self._rebuild(external_sort(self, key=key, reverse=reverse,
+                                        max_in_memory=max_in_memory,
+                                        typecode=self.typecode, tmp_dir=tmp_dir))
+            return
+        self._rebuild(sorted(self, key=key, reverse=reverse))
+
+
+def _merge_values(it1, it2):
+    """Yield the merge of two sorted iterables, preferring it2 on ties."""
+    sentinel = object()
+    a, b = next(it1, sentinel), next(it2, sentinel)
+    while a is not sentinel and b is not sentinel:
+        if a < b:
+            yield a
+            a = next(it1, sentinel)
+        else:
+            yield b
+            b = next(it2, sentinel)
+    if a is not sentinel:
+        yield a
+        yield from it1
+    if b is not sentinel:
+        yield b
+        yield from it2
 
-        curr.next = l1 if l1 else l2
-        return dummy.next
-    
-    def sort(self):
-        self.head = self._merge_sort(self.head)
 
 def merge_sorted_lists(l1, l2):
+    """
+    Merge two sorted lists by relinking their nodes.
+    The nodes are moved into the result, so l1 and l2 are left empty.
+    Array-backed lists are merged into a new list of the same type as l1.
+    """
+    if not (isinstance(l1, LinkedList) and isinstance(l2, LinkedList)):
+        if isinstance(l1, ArrayLinkedList):
+            merged = ArrayLinkedList(typecode=l1.typecode)
+        else:
+            merged = type(l1)()
+        merged.extend(_merge_values(iter(l1), iter(l2)))
+        l1.clear()
+        l2.clear()
+        return merged
+
     dummy = Node(0)
     curr = dummy
 
@@ -92,4 +386,28 @@ def merge_sorted_lists(l1, l2):
 
     merged = LinkedList()
     merged.head = dummy.next
+    if h1:
+        merged.tail = l1.tail
+    elif h2:
+        merged.tail = l2.tail
+    else:
+        merged.tail = curr if merged.head else None
+    merged.size = l1.size + l2.size
+
+    l1.clear()
+    l2.clear()
     return merged
+
+
+def merge_sorted_iter(*sources, key=None, reverse=False):
+    """
+    Lazily merge any number of sorted sources (LinkedLists or iterables)
+    with a heap of the current head of each source, in O(n log k).
+    Equal keys are yielded in source order, so the merge is stable.
+    """
+    return heap_merge(*(iter(src) for src in sources), key=key, reverse=reverse)
+
+
+def merge_k_sorted_lists(*sources, key=None, reverse=False):
+    """Materialize merge_sorted_iter into a new LinkedList."""
+    return LinkedList.from_iterable(merge_sorted_iter(*sources, key=key, reverse=reverse))
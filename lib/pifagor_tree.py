@@ -1,6 +1,14 @@
+from matplotlib.collections import PolyCollection
 from matplotlib.patches import Polygon
+from PIL import Image, ImageColor, ImageDraw
 
 import math
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
 
 def draw_square(ax, x, y, size, angle, face=None, edge="#8b2b2b", lw=1.0):
     # Draw a square centered at (x, y) with given size and rotation angle
@@ -41,3 +49,373 @@ def pythagoras_tree(ax, x, y, size, angle, depth):
     right_angle = angle - math.pi / 4
     xR, yR = p2
     pythagoras_tree(ax, xR, yR, child, right_angle, depth - 1)
+
+
+# =========================
+# Vectorized engine (NumPy)
+# =========================
+
+def _level_linewidth(remaining_depth):
+    # Same rule as pythagoras_tree: depth counts the levels still to draw
+    return max(0.5, 2.0 * (0.85 ** remaining_depth))
+
+
+def square_corners(xs, ys, size, angles):
+    """
+    Corners of many squares at once.
+    xs, ys, angles: arrays of shape (n,); size: side length shared by all.
+    Returns an array of shape (n, 4, 2) ordered p0, p1, p2, p3 as in draw_square.
+    """
+    c, s = np.cos(angles)[:, None], np.sin(angles)[:, None]
+    u = np.array([0.0, size, size, 0.0])
+    v = np.array([0.0, 0.0, size, size])
+    corners = np.empty((len(xs), 4, 2))
+    corners[:, :, 0] = xs[:, None] + u * c - v * s
+    corners[:, :, 1] = ys[:, None] + u * s + v * c
+    return corners
+
+
+def child_origins(corners, angles):
+    """
+    Origins and angles of the next level.
+    Children are interleaved (left, right) per parent, so square i of a
+    level has its children at 2i and 2i + 1 of the next one (heap order).
+    """
+    origins = np.stack([corners[:, 3], corners[:, 2]], axis=1).reshape(-1, 2)
+    child_angles = np.stack([angles + math.pi / 4, angles - math.pi / 4], axis=1).reshape(-1)
+    return origins[:, 0], origins[:, 1], child_angles
+
+
+def pythagoras_tree_levels(x, y, size, angle, depth):
+    """
+    Generate the tree one level at a time.
+    Yields (level, corners) with corners of shape (2**level, 4, 2);
+    each level is computed from the previous level's p2/p3 corners.
+    """
+    xs, ys = np.array([x], dtype=float), np.array([y], dtype=float)
+    angles = np.array([angle], dtype=float)
+    for level in range(depth + 1):
+        corners = square_corners(xs, ys, size, angles)
+        yield level, corners
+        if level < depth:
+            xs, ys, angles = child_origins(corners, angles)
+            size /= math.sqrt(2.0)
+
+
+def pythagoras_tree_fast(ax, x, y, size, angle, depth, face=None, edge="#8b2b2b"):
+    """
+    Draw the same tree as pythagoras_tree with a single PolyCollection.
+    Returns the collection.
+    """
+    levels = list(pythagoras_tree_levels(x, y, size, angle, depth))
+    verts = np.concatenate([corners for _, corners in levels])
+    linewidths = np.concatenate([
+        np.full(len(corners), _level_linewidth(depth - level)) for level, corners in levels
+    ])
+    coll = PolyCollection(verts, closed=True, facecolors=face or (1, 1, 1, 0),
+                          edgecolors=edge, linewidths=linewidths)
+    ax.add_collection(coll)
+    return coll
+
+
+# =========================
+# Interactive view with a per-level cache
+# =========================
+
+ARTIST_BYTES_PER_SQUARE = 350  # rough size of one polygon path inside a PolyCollection
+
+
+class PythagorasTreeView:
+    """
+    Keeps one PolyCollection per tree level on ax and changes depth incrementally.
+    Going from depth d to d + 1 computes only the new level; going down
+    just hides artists. Cached levels are bounded by max_bytes: when the
+    budget is exceeded, hidden levels are evicted least recently shown
+    first, and among those the deepest first.
+    """
+    def __init__(self, ax, x, y, size, angle, max_bytes=512 * 2**20, edge="#8b2b2b"):
+        self.ax = ax
+        self.root = (x, y, size, angle)
+        self.max_bytes = max_bytes
+        self.edge = edge
+        self.depth = -1
+        self._levels = OrderedDict()  # level -> (corners, angles, artist), LRU order
+
+    @property
+    def nbytes(self):
+        return sum(self._level_bytes(level) for level in self._levels)
+
+    def _level_bytes(self, level):
+        corners, angles, _ = self._levels[level]
+        return corners.nbytes + angles.nbytes + ARTIST_BYTES_PER_SQUARE * len(corners)
+
+    def _compute_level(self, level):
+        x, y, size, angle = self.root
+        if level == 0:
+            angles = np.array([angle], dtype=float)
+            corners = square_corners(np.array([x], dtype=float), np.array([y], dtype=float), size, angles)
+        else:
+            # Ancestors of the requested depth are always cached (see set_depth)
+            parent_corners, parent_angles, _ = self._levels[level - 1]
+            xs, ys, angles = child_origins(parent_corners, parent_angles)
+            corners = square_corners(xs, ys, size / math.sqrt(2.0) ** level, angles)
+
+        artist = PolyCollection(corners, closed=True, facecolors=(1, 1, 1, 0), edgecolors=self.edge)
+        self.ax.add_collection(artist)
+        self._levels[level] = (corners, angles, artist)
+
+    def _evict(self, depth):
+        # Least recently shown first. set_depth refreshes shown levels
+        # deepest first, so among levels last shown together the deepest goes first.
+        candidates = [level for level in self._levels if level > depth]
+        total = self.nbytes
+        for level in candidates:
+            if total <= self.max_bytes:
+                break
+            total -= self._level_bytes(level)
+            _, _, artist = self._levels.pop(level)
+            artist.remove()
+
+    def set_depth(self, depth):
+        """Show levels 0..depth, computing only the levels that are not cached."""
+        for level in range(depth + 1):
+            if level not in self._levels:
+                self._compute_level(level)
+            _, _, artist = self._levels[level]
+            artist.set_linewidth(_level_linewidth(depth - level))
+            artist.set_visible(True)
+
+        for level, (_, _, artist) in self._levels.items():
+            if level > depth:
+                artist.set_visible(False)
+
+        for level in reversed(range(depth + 1)):
+            self._levels.move_to_end(level)
+        self.depth = depth
+        self._evict(depth)
+
+
+# =========================
+# Headless raster renderer (Pillow)
+# =========================
+
+# Any point of a subtree lies within SUBTREE_RADIUS * side of its root
+# square's center (the whole tree spans about 6.5 x 5 root sides)
+SUBTREE_RADIUS = 3.54
+
+
+def _to_pixels(corners, xmin, ymax, scale):
+    return (corners[..., 0] - xmin) * scale, (ymax - corners[..., 1]) * scale
+
+
+def _ink(pixels, px, py, rgb):
+    """Set the pixels containing the points (px, py) that fall inside the image."""
+    cx, cy = px.astype(np.int64).ravel(), py.astype(np.int64).ravel()
+    height, width = pixels.shape[:2]
+    inside = (px.ravel() >= 0) & (cx < width) & (py.ravel() >= 0) & (cy < height)
+    pixels[cy[inside], cx[inside]] = rgb
+
+
+def _ink_subtrees(pixels, xs, ys, side, angles, levels_left, window, rgb):
+    """
+    Ink the sub-pixel subtrees rooted at (xs, ys, angles): the corner pixels
+    of every square, level by level, until a whole subtree fits within half
+    a pixel of its root's center, which is then inked instead.
+    window: (xmin, ymax, scale) of the world -> pixel mapping.
+    """
+    scale = window[2]
+    while True:
+        corners = square_corners(xs, ys, side, angles)
+        px, py = _to_pixels(corners, *window)
+        _ink(pixels, px, py, rgb)
+        if levels_left == 0:
+            return
+        if SUBTREE_RADIUS * side * scale < 0.5:
+            _ink(pixels, px.mean(axis=1), py.mean(axis=1), rgb)
+            return
+        xs, ys, angles = child_origins(corners, angles)
+        side /= math.sqrt(2.0)
+        levels_left -= 1
+
+
+def rasterize_pythagoras_tree(x, y, size, angle, depth, width=1024,
+                              bounds=(-2.2, 2.2, -0.2, 3.2),
+                              edge="#8b2b2b", background="white", chunk_size=4096):
+    """
+    Render the tree straight into an RGB NumPy buffer, without matplotlib.
+
+    Squares at least one pixel wide are drawn as outlines. Smaller squares
+    only ink the pixels under their corners, and a subtree is cut off once
+    its whole extent (SUBTREE_RADIUS around its root) fits within half a
+    pixel. Sub-pixel subtrees are processed chunk_size roots at a time, so
+    work and memory are bounded by the resolution, not by depth.
+
+    Args:
+        x, y, size, angle, depth: same meaning as in pythagoras_tree
+        width: image width in pixels; height follows the bounds' aspect ratio
+        bounds: (xmin, xmax, ymin, ymax) world window
+        edge, background: colors accepted by Pillow
+
+    Returns:
+        np.ndarray of shape (height, width, 3), dtype uint8
+    """
+    xmin, xmax, ymin, ymax = bounds
+    scale = width / (xmax - xmin)
+    height = max(1, int(round((ymax - ymin) * scale)))
+    edge_rgb = ImageColor.getrgb(edge)[:3]
+
+    image = Image.new("RGB", (width, height), background)
+    draw = ImageDraw.Draw(image)
+
+    xs, ys = np.array([x], dtype=float), np.array([y], dtype=float)
+    angles = np.array([angle], dtype=float)
+    side = size
+    level = 0
+    while side * scale >= 1.0:
+        corners = square_corners(xs, ys, side, angles)
+        px, py = _to_pixels(corners, xmin, ymax, scale)
+        lw = max(1, int(round(_level_linewidth(depth - level))))
+        for quad in np.stack([px, py], axis=2).tolist():
+            draw.polygon([tuple(p) for p in quad], outline=edge_rgb, width=lw)
+        if level == depth:
+            return np.array(image)
+        xs, ys, angles = child_origins(corners, angles)
+        side /= math.sqrt(2.0)
+        level += 1
+
+    pixels = np.array(image)
+    for s in range(0, len(xs), chunk_size):
+        e = s + chunk_size
+        _ink_subtrees(pixels, xs[s:e], ys[s:e], side, angles[s:e], depth - level,
+                      (xmin, ymax, scale), edge_rgb)
+    return pixels
+
+
+def save_pythagoras_png(path, x, y, size, angle, depth, width=1024, **kwargs):
+    """Rasterize the tree and write it to path as a PNG. Returns the path."""
+    pixels = rasterize_pythagoras_tree(x, y, size, angle, depth, width=width, **kwargs)
+    Image.fromarray(pixels).save(path, format="PNG")
+    return path
+
+
+# =========================
+# Process-parallel generation (shared memory)
+# =========================
+
+def _level_offset(level):
+    # Levels are stored back to back in heap order: level L starts at 2^L - 1
+    return (1 << level) - 1
+
+
+def pythagoras_tree_corners(x, y, size, angle, depth):
+    """All corners as one (2**(depth+1) - 1, 4, 2) array in heap (level) order."""
+    return np.concatenate([c for _, c in pythagoras_tree_levels(x, y, size, angle, depth)])
+
+
+class _SharedBlock:
+    """
+    Exposes a SharedMemory block through __array_interface__, so that
+    np.asarray(block) has the block as its .base: the mapping stays open
+    while any view of the array is alive and is closed with the last one.
+    """
+    def __init__(self, shm, shape, dtype):
+        self.shm = shm
+        address = np.ndarray(shape, dtype=dtype, buffer=shm.buf).ctypes.data
+        self.__array_interface__ = {"shape": shape, "typestr": np.dtype(dtype).str,
+                                    "data": (address, False), "version": 3}
+
+
+def _open_corners(target, total):
+    """Worker side of the output: ("shm", name) or ("npy", path). Returns (array, closer)."""
+    kind, where = target
+    if kind == "npy":
+        out = np.load(where, mmap_mode="r+")
+        return out, out.flush
+    shm = shared_memory.SharedMemory(name=where)
+    return np.ndarray((total, 4, 2), dtype=np.float64, buffer=shm.buf), shm.close
+
+
+def _fill_subtrees(target, total, depth, split_depth, size, roots):
+    """
+    Worker: generate the subtrees rooted at split_depth and write every
+    level straight into the shared corner array.
+    roots: list of (index within split level, x, y, angle).
+    """
+    out, close = _open_corners(target, total)
+    try:
+        for j, x, y, angle in roots:
+            for rel, corners in pythagoras_tree_levels(x, y, size, angle, depth - split_depth):
+                start = _level_offset(split_depth + rel) + j * len(corners)
+                out[start:start + len(corners)] = corners
+    finally:
+        del out
+        close()
+
+
+def pythagoras_tree_corners_parallel(x, y, size, angle, depth, split_depth=None, processes=None, out_path=None):
+    """
+    Same result as pythagoras_tree_corners, computed in a process pool.
+
+    Levels 0..split_depth are generated here; each of the 2**split_depth
+    squares on the split level then roots an independent subtree. Workers
+    write their levels into one shared output at fixed heap offsets, so
+    the output is deterministic and nothing is pickled back or copied.
+
+    Args:
+        split_depth: level to split at (default: enough subtrees for ~4 per process)
+        processes: pool size (default: os.cpu_count())
+        out_path: if given, the corners are written to this .npy file and
+            returned as a memmap instead of living in shared memory
+
+    Returns:
+        np.ndarray (or np.memmap) of shape (2**(depth+1) - 1, 4, 2)
+    """
+    processes = processes or os.cpu_count() or 1
+    if split_depth is None:
+        split_depth = max(0, math.ceil(math.log2(4 * processes)))
+    split_depth = min(split_depth, depth)
+    if (split_depth == depth or processes == 1) and out_path is None:
+        return pythagoras_tree_corners(x, y, size, angle, depth)
+
+    total = _level_offset(depth + 1)
+    shape = (total, 4, 2)
+    if out_path is not None:
+        out = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float64, shape=shape)
+        target = ("npy", out_path)
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=total * 4 * 2 * 8)
+        # The result keeps the block mapped; its name is removed once the
+        # workers are done, so it is freed with the last reference.
+        out = np.asarray(_SharedBlock(shm, shape, np.float64))
+        target = ("shm", shm.name)
+    try:
+        # Top of the tree, plus the origins/angles of the split-level roots
+        xs, ys = np.array([x], dtype=float), np.array([y], dtype=float)
+        angles = np.array([angle], dtype=float)
+        level_size = size
+        for level in range(split_depth):
+            corners = square_corners(xs, ys, level_size, angles)
+            out[_level_offset(level):_level_offset(level + 1)] = corners
+            xs, ys, angles = child_origins(corners, angles)
+            level_size /= math.sqrt(2.0)
+
+        if split_depth == depth:
+            out[_level_offset(depth):] = square_corners(xs, ys, level_size, angles)
+        else:
+            roots = list(zip(range(len(xs)), xs.tolist(), ys.tolist(), angles.tolist()))
+            n_chunks = min(len(roots), 4 * processes)
+            chunks = [roots[i::n_chunks] for i in range(n_chunks)]
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                futures = [
+                    pool.submit(_fill_subtrees, target, total, depth, split_depth, level_size, chunk)
+                    for chunk in chunks
+                ]
+                for f in futures:
+                    f.result()
+    finally:
+        if out_path is None:
+            shm.unlink()
+
+    if out_path is not None:
+        out.flush()
+    return out
@@ -0,0 +1,147 @@
+"""
+Priority queues for lib.dijkstra.dijkstra.
+
+All queues take the vertex count n in the constructor and share one protocol:
+    push(v, key)  insert v, or lower its key if it is already queued
+    pop()         remove and return (key, v) with the smallest key
+    len(queue)    number of queued entries
+"""
+from heapq import heappush, heappop
+
+
+class LazyHeap:
+    """
+    Binary heap (heapq) with lazy deletion.
+    push never updates in place: it adds another entry, and outdated
+    entries are popped later and skipped by the caller.
+    """
+    def __init__(self, n):
+        self.heap = []
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, v, key):
+        heappush(self.heap, (key, v))
+
+    def pop(self):
+        return heappop(self.heap)
+
+
+class IndexedDaryHeap:
+    """
+    d-ary min-heap with a position index and real decrease-key.
+    Every vertex is in the heap at most once, so its size stays <= n.
+    """
+    def __init__(self, n, d=4):
+        self.d = d
+        self.heap = []        # vertices in heap order
+        self.keys = [0] * n   # key of each queued vertex
+        self.pos = [-1] * n   # index of each vertex in heap, -1 if absent
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, v, key):
+        i = self.pos[v]
+        if i == -1:
+            self.heap.append(v)
+            i = len(self.heap) - 1
+        elif key >= self.keys[v]:
+            return
+        self.keys[v] = key
+        self._sift_up(i)
+
+    def pop(self):
+        heap, pos = self.heap, self.pos
+        top = heap[0]
+        last = heap.pop()
+        pos[top] = -1
+        if heap:
+            heap[0] = last
+            pos[last] = 0
+            self._sift_down(0)
+        return self.keys[top], top
+
+    def _sift_up(self, i):
+        heap, keys, pos, d = self.heap, self.keys, self.pos, self.d
+        v = heap[i]
+        key = keys[v]
+        while i > 0:
+            p = (i - 1) // d
+            u = heap[p]
+            if keys[u] <= key:
+                break
+            heap[i] = u
+            pos[u] = i
+            i = p
+        heap[i] = v
+        pos[v] = i
+
+    def _sift_down(self, i):
+        heap, keys, pos, d = self.heap, self.keys, self.pos, self.d
+        size = len(heap)
+        v = heap[i]
+        key = keys[v]
+        while True:
+            first = d * i + 1
+            if first >= size:
+                break
+            # Smallest of up to d children
+            best = first
+            best_key = keys[heap[first]]
+            for c in range(first + 1, min(first + d, size)):
+                ck = keys[heap[c]]
+                if ck < best_key:
+                    best, best_key = c, ck
+            if best_key >= key:
+                break
+            u = heap[best]
+            heap[i] = u
+            pos[u] = i
+            i = best
+        heap[i] = v
+        pos[v] = i
+
+
+class BucketQueue:
+    """
+    Dial's bucket queue for small non-negative integer weights.
+    While Dijkstra runs, all queued keys lie in [current, current + max_weight],
+    so max_weight + 1 circular buckets suffice; push and decrease-key are
+    O(1) and pop scans forward at most max_weight empty buckets.
+    Only valid with monotone pops (as in Dijkstra) and integer keys.
+    """
+    def __init__(self, n, max_weight):
+        if max_weight < 0 or int(max_weight) != max_weight:
+            raise ValueError("BucketQueue needs a non-negative integer max_weight.")
+        self.size = int(max_weight) + 1
+        self.buckets = [set() for _ in range(self.size)]
+        self.keys = [-1] * n  # key of each queued vertex, -1 if absent
+        self.current = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def push(self, v, key):
+        old = self.keys[v]
+        if old != -1:
+            if key >= old:
+                return
+            self.buckets[old % self.size].discard(v)
+            self.count -= 1
+        self.keys[v] = key
+        self.buckets[key % self.size].add(v)
+        self.count += 1
+
+    def pop(self):
+        if not self.count:
+            raise IndexError("pop from an empty BucketQueue")
+        buckets, size = self.buckets, self.size
+        while not buckets[self.current % size]:
+            self.current += 1
+        v = buckets[self.current % size].pop()
+        self.keys[v] = -1
+        self.count -= 1
+        return self.current, v
@@ -0,0 +1,172 @@
+"""
+Shared binary tree core used by lib.binary_tree and lib.binary_tree_traversal.
+
+Two representations of the same tree:
+  - Node: a linked node with __slots__ and a cheap integer id
+  - ImplicitTree: the level-order (heap) array itself plus a presence
+    mask, where node i has children 2i + 1 and 2i + 2 and its index is its id
+"""
+from itertools import count
+
+import networkx as nx
+import numpy as np
+
+_node_ids = count()
+
+
+class Node:
+    """
+    Binary tree node.
+    Keeps: value, left, right, a display color, and a unique integer id
+    (used as the NetworkX node key).
+    """
+    __slots__ = ("left", "right", "val", "color", "id")
+
+    def __init__(self, key, color="skyblue"):
+        self.left = None
+        self.right = None
+        self.val = key
+        self.color = color
+        self.id = next(_node_ids)
+
+
+def build_tree_from_level_array(level_list, color_fn=None):
+    """
+    Build a binary tree from a level-order (heap-like) array.
+    None in the array means "no node" at that index.
+
+    Args:
+        level_list: list of values (e.g., [1, 3, 5, 7, 9, 11, 13])
+        color_fn: optional function (value, index) -> initial color (str)
+
+    Returns:
+        root: Node
+    """
+    if not level_list:
+        return None
+
+    # Create nodes or None placeholders
+    nodes = []
+    for i, v in enumerate(level_list):
+        if v is None:
+            nodes.append(None)
+        else:
+            color = color_fn(v, i) if color_fn else "skyblue"
+            nodes.append(Node(v, color=color))
+
+    # Connect children using array indices
+    n = len(nodes)
+    for i in range(n):
+        if nodes[i] is None:
+            continue
+        li = 2 * i + 1
+        ri = 2 * i + 2
+        if li < n and nodes[li] is not None:
+            nodes[i].left = nodes[li]
+        if ri < n and nodes[ri] is not None:
+            nodes[i].right = nodes[ri]
+
+    return nodes[0]
+
+
+# =========================
+# Closed-form heap geometry
+# =========================
+
+def heap_levels(size):
+    """Level (depth) of every heap index 0..size-1: floor(log2(i + 1)), computed exactly."""
+    _, exponent = np.frexp(np.arange(1, size + 1, dtype=np.float64))
+    return exponent.astype(np.int64) - 1
+
+
+def heap_positions(size):
+    """
+    (x, y) of every heap index, the same geometry the node-based layouts use:
+    index i on level L, at position p = i - (2^L - 1) within the level,
+    sits at x = (2p + 1) / 2^L - 1, y = -L.
+    """
+    level = heap_levels(size)
+    first = (1 << level) - 1
+    x = (2 * (np.arange(size) - first) + 1) / np.exp2(level) - 1
+    return x, -level.astype(np.float64)
+
+
+def heap_reachable(present):
+    """
+    Mask of indices that belong to the tree: present, and every ancestor
+    present too (build_tree_from_level_array drops the rest).
+    """
+    reachable = np.array(present, dtype=bool)
+    start = 1
+    while start < len(reachable):
+        stop = min(2 * start + 1, len(reachable))
+        parents = (np.arange(start, stop) - 1) // 2
+        reachable[start:stop] &= reachable[parents]
+        start = stop
+    return reachable
+
+
+class ImplicitTree:
+    """
+    Array-backed binary tree: values in level order plus a mask of which
+    indices are nodes. No per-node objects; the index is the node id.
+    """
+    def __init__(self, values, present, colors=None):
+        self.values = values
+        self.present = heap_reachable(present)
+        self.colors = colors
+
+    @classmethod
+    def from_level_array(cls, level_list, color_fn=None):
+        """Same input as build_tree_from_level_array (None = no node)."""
+        present = np.fromiter((v is not None for v in level_list), dtype=bool, count=len(level_list))
+        tree = cls(level_list, present)
+        if color_fn:
+            tree.colors = [color_fn(level_list[i], i) if ok else None
+                           for i, ok in enumerate(tree.present.tolist())]
+        return tree
+
+    def __len__(self):
+        return int(self.present.sum())
+
+    def color(self, i, default="skyblue"):
+        return self.colors[i] if self.colors else default
+
+    def indices(self):
+        """Indices of all nodes in level order."""
+        return np.flatnonzero(self.present)
+
+    def edges(self):
+        """(parents, children) index arrays, one entry per edge."""
+        idx = self.indices()
+        children = idx[idx > 0]
+        return (children - 1) // 2, children
+
+    def positions(self):
+        """(x, y) arrays for every index (see heap_positions)."""
+        return heap_positions(len(self.values))
+
+    def depth(self):
+        idx = self.indices()
+        return int(heap_levels(int(idx[-1]) + 1)[-1]) if len(idx) else -1
+
+    def to_networkx(self):
+        """
+        DiGraph keyed by index with {'color', 'label'} node attributes,
+        plus a positions dict, without creating Node objects.
+        """
+        x, y = self.positions()
+        G = nx.DiGraph()
+        pos = {}
+        for i in self.indices().tolist():
+            G.add_node(i, color=self.color(i), label=self.values[i])
+            pos[i] = (float(x[i]), float(y[i]))
+        parents, children = self.edges()
+        G.add_edges_from(zip(parents.tolist(), children.tolist()))
+        return G, pos
+
+    def to_nodes(self):
+        """Materialize linked Node objects; returns the root."""
+        values = [v if ok else None for v, ok in zip(self.values, self.present.tolist())]
+        color_fn = (lambda v, i: self.colors[i]) if self.colors else None
+        return build_tree_from_level_array(values, color_fn=color_fn)
@@ -11,7 +11,7 @@ from lib.monte_karlo_algo import (
     theoretical_probabilities, simulate_two_dice,
     compare_probabilities, print_table, save_plot
 )
-from lib.pifagor_tree import pythagoras_tree
+from lib.pifagor_tree import PythagorasTreeView
 
 import matplotlib.pyplot as plt
 import json, math, os, time
@@ -21,10 +21,7 @@ init(autoreset=True)
 def main():
     print_task_header(1)
     print(Fore.GREEN + "Linked List Operations:")
-    linked_list = LinkedList()
-    
-    for value in [3, 1, 4, 1, 5, 9, 2, 6, 5]:
-        linked_list.append(value)
+    linked_list = LinkedList.from_iterable([3, 1, 4, 1, 5, 9, 2, 6, 5])
 
     print(Fore.BLUE + "Original Linked List:")
     linked_list.print_list()
@@ -37,13 +34,8 @@ def main():
     print(Fore.BLUE + "Sorted Linked List:")
     linked_list.print_list()
 
-    lst1 = LinkedList()
-    for value in [1, 3, 5]:
-        lst1.append(value)
-
-    lst2 = LinkedList()
-    for value in [2, 4, 6]:
-        lst2.append(value)
+    lst1 = LinkedList.from_iterable([1, 3, 5])
+    lst2 = LinkedList.from_iterable([2, 4, 6])
 
     merged = merge_sorted_lists(lst1, lst2)
     print(Fore.BLUE + "Merged Linked List:")
@@ -54,7 +46,7 @@ def main():
     print(Fore.GREEN + "Pythagoras Tree Visualization:")
 
     plt.ion()
-    fig, ax = None, None
+    fig, ax, tree_view = None, None, None
 
     while True:
         cmd = input(Fore.YELLOW + "Enter 'q' to jump to task 3 or recursion depth: ").strip().lower()
@@ -71,8 +63,8 @@ def main():
             print(Fore.RED + "Please enter a non-negative integer.")
             continue
 
-        if recursion_depth > 7:
-            print(Fore.RED + "Recursion depth too high, please enter a value <= 7.")
+        if recursion_depth > 18:
+            print(Fore.RED + "Recursion depth too high, please enter a value <= 18.")
             continue
         
         print(Fore.GREEN + f"Recursion depth set to: {recursion_depth}")
@@ -84,14 +76,14 @@ def main():
             except Exception:
                 pass
 
-        ax.cla()
-        ax.set_aspect('equal')
-        ax.axis('off')
-
-        pythagoras_tree(ax, x=0.0, y=1.0, size=1.0, angle=math.pi/4, depth=recursion_depth)
+            ax.set_aspect('equal')
+            ax.axis('off')
+            ax.set_xlim(-2.2, 2.2)
+            ax.set_ylim(-0.2, 3.2)
+            tree_view = PythagorasTreeView(ax, x=0.0, y=1.0, size=1.0, angle=math.pi/4)
 
-        ax.set_xlim(-2.2, 2.2)
-        ax.set_ylim(-0.2, 3.2)
+        # Only levels that were never shown (or were evicted) are computed
+        tree_view.set_depth(recursion_depth)
 
         fig.canvas.draw_idle()
         plt.pause(0.001)